@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomUser
+from .models import CustomUser, Organization
 from django.contrib.auth.admin import UserAdmin
 from .forms import RegisterForm
 
@@ -8,7 +8,9 @@ class CustomUserAdmin(UserAdmin):
     model = CustomUser
     add_form = RegisterForm
 
-    list_display = ['username','email']
+    list_display = ['username','email','organization']
+    fieldsets = UserAdmin.fieldsets + ((None, {'fields': ('organization',)}),)
 
 
-admin.site.register(CustomUser, CustomUserAdmin)   
\ No newline at end of file
+admin.site.register(CustomUser, CustomUserAdmin)
+admin.site.register(Organization)   
\ No newline at end of file
@@ -0,0 +1,17 @@
+from .tenancy import reset_current_organization, set_current_organization
+
+
+class TenantMiddleware:
+    """Make the signed-in user's organization the current tenant for the request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = getattr(request, "user", None)
+        organization = user.organization if user is not None and user.is_authenticated else None
+        token = set_current_organization(organization)
+        try:
+            return self.get_response(request)
+        finally:
+            reset_current_organization(token)
@@ -1,6 +1,23 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+
+class Organization(models.Model):
+    name = models.CharField(max_length=255)
+    slug = models.SlugField(unique=True)
+    # DocuSign account the organization's envelopes are sent from; empty
+    # means each sender's own account is used.
+    docusign_account_id = models.CharField(max_length=255, blank=True)
+    # Database alias holding this organization's contracts (see TenantRouter)
+    database = models.CharField(max_length=64, default="default")
+
+    def __str__(self):
+        return self.name
+
+
 # Create your models here.
 class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
+    organization = models.ForeignKey(
+        Organization, on_delete=models.SET_NULL, null=True, blank=True, related_name="members"
+    )
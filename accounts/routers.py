@@ -0,0 +1,38 @@
+from django.conf import settings
+
+from .tenancy import get_current_organization
+
+# Models whose rows belong to a single organization and may live on its database
+TENANT_MODELS = {"contracts.contract"}
+
+
+class TenantRouter:
+    """Place tenant-scoped rows on the database their organization names.
+
+    The tenant comes from the instance being saved or related to, otherwise
+    from the request's current organization. Everything else, users and
+    organizations included, stays on the default database. Enable it by
+    listing extra aliases in TENANT_DATABASES.
+    """
+
+    def _db_for(self, model, **hints):
+        if model._meta.label_lower not in TENANT_MODELS:
+            return "default"
+        instance = hints.get("instance")
+        organization = None
+        if instance is not None and model._meta.label_lower == instance._meta.label_lower:
+            organization = instance.organization if instance.organization_id else None
+        organization = organization or get_current_organization()
+        if organization is not None and organization.database in settings.DATABASES:
+            return organization.database
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Contracts point at users and organizations on the default database.
+        return True
@@ -0,0 +1,22 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_current_organization = ContextVar("current_organization", default=None)
+
+
+def get_current_organization():
+    return _current_organization.get()
+
+
+def set_current_organization(organization):
+    return _current_organization.set(organization)
+
+
+def reset_current_organization(token):
+    _current_organization.reset(token)
+
+
+def tenant_databases():
+    """Aliases of every database that may hold tenant-scoped rows."""
+    return ["default", *settings.TENANT_DATABASES]
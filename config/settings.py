@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 from dotenv import load_dotenv
+import json
 import os
 
 
@@ -48,10 +49,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "accounts.middleware.TenantMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -62,8 +65,16 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [str(BASE_DIR.joinpath('templates'))],
-        "APP_DIRS": True,
         "OPTIONS": {
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -87,6 +98,62 @@ DATABASES = {
     }
 }
 
+# Extra databases for large organizations, as a JSON object of aliases to
+# DATABASES entries. An Organization whose ``database`` names one of them
+# has its contracts stored there; run ``migrate --database <alias>`` first.
+TENANT_DATABASES = json.loads(os.getenv("TENANT_DATABASES", "{}"))
+DATABASES.update(TENANT_DATABASES)
+DATABASE_ROUTERS = ["accounts.routers.TenantRouter"] if TENANT_DATABASES else []
+
+# Envelope audit events can live on their own database, given as a JSON
+# DATABASES entry; run ``migrate --database audit`` first.
+AUDIT_DATABASE = json.loads(os.getenv("AUDIT_DATABASE", "null"))
+if AUDIT_DATABASE:
+    DATABASES["audit"] = AUDIT_DATABASE
+    DATABASE_ROUTERS.insert(0, "contracts.routers.AuditRouter")
+AUDIT_EVENTS_PAGE_SIZE = int(os.getenv("AUDIT_EVENTS_PAGE_SIZE", "500"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# CACHE_BACKEND is one of "locmem", "file" or "redis" (any Redis-protocol server).
+# locmem is per process; deployments with several workers need redis or file.
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+
+if CACHE_BACKEND == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"),
+        }
+    }
+elif CACHE_BACKEND == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_LOCATION", os.path.join(BASE_DIR, ".cache")),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a rendered contract row stays cached; rows are also evicted on save
+CONTRACT_ROW_CACHE_TIMEOUT = 600
+# Seconds a fetched envelope status is reused by the list's Refresh actions
+ENVELOPE_STATUS_CACHE_TIMEOUT = 30
+STATUS_REFRESH_CONCURRENCY = 4
+STATUS_REFRESH_MAX_IDS = 500
+
+# Server-sent contract status stream (served over ASGI)
+LIVE_STATUS_BUFFER = 100
+LIVE_STATUS_POLL_INTERVAL = 1.0
+LIVE_STATUS_HEARTBEAT = 15
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -123,6 +190,47 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = "static/"
+STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+STATICFILES_DIRS = [BASE_DIR / "static"]
+
+# collectstatic writes content-hashed files plus .gz and .br siblings;
+# WhiteNoise serves the hashed names with far-future Cache-Control headers.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+WHITENOISE_MANIFEST_STRICT = False
+
+# Days to keep each generated file, by contract state (None keeps it forever).
+# The .docx is only an intermediate once the PDF has been sent to DocuSign.
+# "queued" contracts still have to be sent by send_queued_contracts from their PDF.
+CONTRACT_FILE_RETENTION = {
+    "contract_file": {"unsent": 30, "queued": 30, "sent": 0, "signed": 0},
+    "pdf_file": {"unsent": 30, "queued": None, "sent": None, "signed": None},
+    "orphan": 7,
+}
+
+# Contract files. STORAGE_BACKEND=s3 stores them in any S3-compatible object
+# store; set AWS_S3_ENDPOINT_URL to target MinIO or another local stand-in.
+if os.getenv("STORAGE_BACKEND") == "s3":
+    STORAGES["default"] = {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {
+            "bucket_name": os.getenv("AWS_STORAGE_BUCKET_NAME", "contracts"),
+            "endpoint_url": os.getenv("AWS_S3_ENDPOINT_URL"),
+            # "path" for MinIO and most other local stand-ins
+            "addressing_style": os.getenv("AWS_S3_ADDRESSING_STYLE"),
+            "access_key": os.getenv("AWS_ACCESS_KEY_ID"),
+            "secret_key": os.getenv("AWS_SECRET_ACCESS_KEY"),
+            "default_acl": "private",
+            "file_overwrite": False,
+            "querystring_auth": True,
+        },
+    }
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -141,9 +249,45 @@ DOCUSIGN_ACCOUNT_ID = os.getenv("DOCUSIGN_ACCOUNT_ID")
 DOCUSIGN_REFRESH_TOKEN = os.getenv("DOCUSIGN_REFRESH_TOKEN")
 DOCUSIGN_CLIENT_ID = os.getenv("DOCUSIGN_CLIENT_ID")
 DOCUSIGN_CLIENT_SECRET = os.getenv("DOCUSIGN_CLIENT_SECRET")
+# Point at a local OAuth stand-in during development, e.g. http://localhost:8081
+DOCUSIGN_OAUTH_BASE = os.getenv("DOCUSIGN_OAUTH_BASE", "https://account-d.docusign.com")
+DOCUSIGN_PRIVATE_KEY_PATH = os.getenv("DOCUSIGN_PRIVATE_KEY_PATH", os.path.join(BASE_DIR, "private.key"))
+DOCUSIGN_IMPERSONATED_USER_ID = os.getenv("DOCUSIGN_IMPERSONATED_USER_ID")
+DOCUSIGN_JWT_SCOPES = os.getenv("DOCUSIGN_JWT_SCOPES", "signature impersonation")
+# Key-encryption keys for stored DocuSign tokens, as "id:base64key,id2:key2"
+# (32-byte urlsafe base64 keys). New values are wrapped with
+# DOCUSIGN_TOKEN_KEK_ID; older ids stay listed until rotate_token_keys has run.
+# Required outside DEBUG: the fallback key is derived from SECRET_KEY above.
+DOCUSIGN_TOKEN_KEKS = dict(
+    item.split(":", 1) for item in os.getenv("DOCUSIGN_TOKEN_KEKS", "").split(",") if item
+)
+DOCUSIGN_TOKEN_KEK_ID = os.getenv("DOCUSIGN_TOKEN_KEK_ID")
+TOKEN_DECRYPT_CACHE_SIZE = 10000
+TOKEN_DECRYPT_CACHE_TTL = 300
+# p95 latency allowed for get_user_token, checked by bench_token_lookup
+TOKEN_LOOKUP_BUDGET_MS = 2.0
+DOCUSIGN_API_BASE = os.getenv("DOCUSIGN_API_BASE", "https://demo.docusign.net/restapi")
+DOCUSIGN_HTTP_TIMEOUT = float(os.getenv("DOCUSIGN_HTTP_TIMEOUT", "10"))
+
+# Circuit breaker around the DocuSign REST API
+DOCUSIGN_BREAKER_FAILURES = 5
+DOCUSIGN_BREAKER_SLOW_CALL = 5.0
+DOCUSIGN_BREAKER_RESET_TIMEOUT = 30.0
+
+# Outbound rate limiting per DocuSign account. Use a cache shared by all
+# workers (Redis/Memcached) for the limits to hold across processes.
+DOCUSIGN_RATE_LIMIT_CACHE = "default"
+DOCUSIGN_RATE_LIMIT_PER_HOUR = int(os.getenv("DOCUSIGN_RATE_LIMIT_PER_HOUR", "3000"))
+DOCUSIGN_BURST_LIMIT = int(os.getenv("DOCUSIGN_BURST_LIMIT", "500"))
+DOCUSIGN_BURST_WINDOW = 30
+# Share of each bucket that bulk jobs leave untouched for interactive sends
+DOCUSIGN_INTERACTIVE_RESERVE = 0.2
 SITE_URL = "https://your-ngrok-url.ngrok.io"
+# Seconds an emailed signing link stays valid
+SIGNING_LINK_MAX_AGE = 30 * 24 * 3600
 
 AUTH_USER_MODEL = 'accounts.CustomUser'
+LOGIN_URL = "login"
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
@@ -1,9 +1,10 @@
 from django.contrib import admin
-from .models import Contract, DocusignProfile
+from .models import AuditAction, Contract, DocusignProfile
 from django.contrib.auth.admin import UserAdmin
 
 # Register your models here.
 
 
 admin.site.register(Contract)
-admin.site.register(DocusignProfile)
\ No newline at end of file
+admin.site.register(DocusignProfile)
+admin.site.register(AuditAction)
\ No newline at end of file
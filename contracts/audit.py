@@ -0,0 +1,155 @@
+import json
+import logging
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils.dateparse import parse_datetime
+
+from accounts.tenancy import tenant_databases
+from .docusign_client import docusign_request, DocusignUnavailable
+from .models import AuditAction, AuditCollection, Contract, EnvelopeAuditEvent
+from .rate_limit import BULK, FairScheduler, RateLimited
+
+logger = logging.getLogger(__name__)
+
+_action_ids = {}
+_action_names = {}
+
+
+def action_id(name):
+    if name not in _action_ids:
+        action, _ = AuditAction.objects.get_or_create(name=name)
+        _action_ids[name] = action.id
+        _action_names[action.id] = name
+    return _action_ids[name]
+
+
+def action_name(pk):
+    if pk not in _action_names:
+        _action_names.update(AuditAction.objects.values_list("id", "name"))
+    return _action_names.get(pk)
+
+
+def parse_event(raw):
+    fields = {f["name"]: f.get("value") for f in raw.get("eventFields", [])}
+    logged_at = parse_datetime(fields.pop("logTime", "") or "")
+    action = fields.pop("Action", None) or "Unknown"
+    details = zlib.compress(json.dumps(fields, separators=(",", ":")).encode("utf-8"))
+    return logged_at, action, details
+
+
+def fetch_audit_events(envelope_id, access_token, account_id, prepaid=False):
+    url = f"{settings.DOCUSIGN_API_BASE}/v2.1/accounts/{account_id}/envelopes/{envelope_id}/audit_events"
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+    try:
+        response = docusign_request("GET", url, account_id, priority=BULK, prepaid=prepaid, headers=headers)
+    except (RateLimited, DocusignUnavailable) as e:
+        logger.warning(f"Audit events for {envelope_id} deferred: {e}")
+        return None
+    if response.status_code != 200:
+        logger.warning(f"Audit events for {envelope_id} failed: {response.status_code} {response.text}")
+        return None
+    return response.json().get("auditEvents") or []
+
+
+def _store(envelope_id, raw_events):
+    events = []
+    for raw in raw_events:
+        logged_at, action, details = parse_event(raw)
+        if logged_at is None:
+            continue
+        events.append(EnvelopeAuditEvent(
+            envelope_id=envelope_id, logged_at=logged_at, action_id=action_id(action), details=details,
+        ))
+    with transaction.atomic(using=router.db_for_write(EnvelopeAuditEvent)):
+        EnvelopeAuditEvent.objects.bulk_create(events, batch_size=1000)
+        AuditCollection.objects.create(envelope_id=envelope_id, event_count=len(events))
+    return len(events)
+
+
+def _start_fetch(pool, limiter, envelope_id, access_token, account_id):
+    # The token is spent here, before the pool gets the job, so the
+    # scheduler's next pick already sees it gone and holds back the
+    # envelopes over quota instead of handing them all to the pool.
+    if limiter.acquire(account_id, priority=BULK):
+        return envelope_id, None
+    return envelope_id, pool.submit(fetch_audit_events, envelope_id, access_token, account_id, prepaid=True)
+
+
+def _signed_batches(batch_size):
+    # Completed envelopes may belong to contracts on any tenant database.
+    for using in tenant_databases():
+        last_id = 0
+        while True:
+            batch = list(
+                Contract.objects.using(using).with_senders()
+                .filter(is_signed=True, document_id__isnull=False, id__gt=last_id)
+                .order_by("id")[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            yield batch
+
+
+def collect_audit_events(get_token, batch_size=200, workers=4, limit=None, max_wait=30.0):
+    """Ingest audit events for completed envelopes not collected yet.
+
+    Each tenant database's contracts are scanned in id order a batch at a
+    time; each batch's envelopes are fetched concurrently, accounts taking turns, and written
+    in one transaction per envelope, so an interrupted run simply continues
+    on the next one. Envelopes left behind by the rate limit are picked up
+    by a later run.
+    Returns ``(envelopes, events)`` ingested.
+    """
+    envelopes = events = 0
+    tokens = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in _signed_batches(batch_size):
+            if limit is not None and envelopes >= limit:
+                break
+            pending = {}
+            for contract in batch:
+                try:
+                    pending[uuid.UUID(contract.document_id)] = contract
+                except ValueError:
+                    logger.warning(f"Contract {contract.id} has a malformed envelope id {contract.document_id!r}")
+            collected = set(AuditCollection.objects.filter(envelope_id__in=pending).values_list("envelope_id", flat=True))
+
+            # Accounts take turns handing work to the pool, so one large
+            # sender's envelopes do not crowd out everyone else's.
+            scheduler = FairScheduler()
+            for envelope_id, contract in pending.items():
+                if envelope_id in collected:
+                    continue
+                key = (contract.organization_id, contract.sender_id)
+                if key not in tokens:
+                    tokens[key] = get_token(contract)
+                if tokens[key]:
+                    access_token, account_id = tokens[key]
+                    scheduler.submit(
+                        account_id, _start_fetch, pool, scheduler.limiter, envelope_id, access_token, account_id
+                    )
+            jobs = scheduler.run(max_wait=max_wait)
+
+            deferred = len(scheduler)
+            for envelope_id, future in jobs:
+                if future is None:
+                    # Another process took the token between pick and spend.
+                    deferred += 1
+                    continue
+                raw_events = future.result()
+                if raw_events is None:
+                    continue
+                events += _store(envelope_id, raw_events)
+                envelopes += 1
+            if deferred:
+                # Out of rate-limit tokens; later batches would only wait too.
+                break
+    return envelopes, events
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .crypto import current_kek_id
+
+
+@register(Tags.security, deploy=True)
+def check_token_keks(app_configs, **kwargs):
+    kek_id = current_kek_id()
+    if kek_id == "default":
+        return [Error(
+            "DocuSign tokens would be encrypted with a key derived from SECRET_KEY.",
+            hint="Set DOCUSIGN_TOKEN_KEKS and DOCUSIGN_TOKEN_KEK_ID.",
+            id="contracts.E001",
+        )]
+    if kek_id not in settings.DOCUSIGN_TOKEN_KEKS:
+        return [Error(
+            f"DOCUSIGN_TOKEN_KEK_ID {kek_id!r} is not listed in DOCUSIGN_TOKEN_KEKS.",
+            id="contracts.E002",
+        )]
+    return []
+
+
+# Backends whose entries live in a single process.
+PER_PROCESS_CACHES = {
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.DEBUG or backend not in PER_PROCESS_CACHES:
+        return []
+    return [Error(
+        f"The default cache ({backend}) is not shared between worker processes.",
+        hint="Set CACHE_BACKEND=redis, or file on a single host. Live status events, "
+             "contract row invalidation and DocuSign rate limits rely on a shared cache.",
+        id="contracts.E003",
+    )]
@@ -0,0 +1,72 @@
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Stop calling an upstream that keeps failing or answering too slowly.
+
+    After ``failure_threshold`` consecutive failures (errors, 5xx responses or
+    calls slower than ``slow_call_seconds``) the breaker opens and calls fail
+    fast with :class:`CircuitOpen`. Once ``reset_timeout`` has passed a single
+    probe is let through; its outcome closes the breaker or opens it again.
+
+    State is per process, which is what protects each worker's thread pool.
+    """
+
+    def __init__(self, name, failure_threshold=5, slow_call_seconds=5.0, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.counters = {"success": 0, "failure": 0, "slow": 0, "rejected": 0, "opened": 0}
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return
+            self.counters["rejected"] += 1
+        raise CircuitOpen(f"{self.name} circuit is open")
+
+    def record(self, ok, latency):
+        slow = latency > self.slow_call_seconds
+        with self._lock:
+            self.probe_in_flight = False
+            if ok and not slow:
+                self.counters["success"] += 1
+                self.failures = 0
+                self.state = CLOSED
+                return
+            self.counters["slow" if ok else "failure"] += 1
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.counters["opened"] += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                **self.counters,
+            }
@@ -0,0 +1,165 @@
+import base64
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.encoding import force_bytes
+
+PREFIX = "enc:v1"
+NONCE_SIZE = 12
+
+
+class DecryptionError(Exception):
+    pass
+
+
+@functools.lru_cache(maxsize=4)
+def _load_keks(configured, secret_key):
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"docusign-token-kek")
+    keys = {"default": hkdf.derive(force_bytes(secret_key))}
+    keys.update((kid, base64.urlsafe_b64decode(key)) for kid, key in configured)
+    return keys
+
+
+def _keks():
+    """Key-encryption keys by id.
+
+    "default" is derived from SECRET_KEY so development setups work without
+    configuration and values written that way can still be rotated onto the
+    keys production configures in DOCUSIGN_TOKEN_KEKS. It is never used to
+    encrypt outside DEBUG, see :func:`_wrapping_kek`.
+    """
+    return _load_keks(tuple(sorted(settings.DOCUSIGN_TOKEN_KEKS.items())), settings.SECRET_KEY)
+
+
+def current_kek_id():
+    return settings.DOCUSIGN_TOKEN_KEK_ID or "default"
+
+
+def _wrapping_kek(kek_id):
+    # SECRET_KEY is committed with the settings, so anything wrapped with the
+    # key derived from it is as good as plaintext to anyone with the repo.
+    if kek_id == "default" and not settings.DEBUG:
+        raise ImproperlyConfigured(
+            "Set DOCUSIGN_TOKEN_KEKS and DOCUSIGN_TOKEN_KEK_ID to encrypt DocuSign tokens outside DEBUG."
+        )
+    return _keks()[kek_id]
+
+
+def _seal(key, plaintext, aad):
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    nonce = os.urandom(NONCE_SIZE)
+    return nonce + AESGCM(key).encrypt(nonce, plaintext, aad)
+
+
+def _open(key, sealed, aad):
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    try:
+        return AESGCM(key).decrypt(sealed[:NONCE_SIZE], sealed[NONCE_SIZE:], aad)
+    except InvalidTag as e:
+        raise DecryptionError("token ciphertext failed authentication") from e
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).decode("ascii")
+
+
+def is_encrypted(value):
+    return isinstance(value, str) and value.startswith(PREFIX + ":")
+
+
+def encrypt(plaintext, kek_id=None):
+    """Envelope-encrypt ``plaintext``: a fresh data key per value, wrapped by a KEK.
+
+    Stored as ``enc:v1:<kek id>:<wrapped data key>:<ciphertext>``.
+    """
+    kek_id = kek_id or current_kek_id()
+    data_key = os.urandom(32)
+    wrapped = _seal(_wrapping_kek(kek_id), data_key, kek_id.encode())
+    ciphertext = _seal(data_key, plaintext.encode("utf-8"), None)
+    return f"{PREFIX}:{kek_id}:{_b64(wrapped)}:{_b64(ciphertext)}"
+
+
+def _parse(value):
+    try:
+        _, _, kek_id, wrapped, ciphertext = value.split(":")
+    except ValueError as e:
+        raise DecryptionError("malformed token ciphertext") from e
+    keks = _keks()
+    if kek_id not in keks:
+        raise DecryptionError(f"unknown key-encryption key {kek_id!r}")
+    data_key = _open(keks[kek_id], base64.urlsafe_b64decode(wrapped), kek_id.encode())
+    return kek_id, data_key, base64.urlsafe_b64decode(ciphertext)
+
+
+def decrypt(value):
+    _, data_key, ciphertext = _parse(value)
+    return _open(data_key, ciphertext, None).decode("utf-8")
+
+
+def rewrap(value, kek_id=None):
+    """Re-wrap the data key under ``kek_id`` without touching the ciphertext."""
+    kek_id = kek_id or current_kek_id()
+    old_kek_id, data_key, ciphertext = _parse(value)
+    if old_kek_id == kek_id:
+        return value
+    wrapped = _seal(_wrapping_kek(kek_id), data_key, kek_id.encode())
+    return f"{PREFIX}:{kek_id}:{_b64(wrapped)}:{_b64(ciphertext)}"
+
+
+class DecryptedCache:
+    """Small LRU of ciphertext -> plaintext with a time-to-live.
+
+    Keyed by the stored ciphertext, so a token that is re-encrypted or
+    refreshed simply misses and the stale entry ages out.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+decrypted_cache = DecryptedCache(settings.TOKEN_DECRYPT_CACHE_SIZE, settings.TOKEN_DECRYPT_CACHE_TTL)
+
+
+def decrypt_cached(value):
+    plaintext = decrypted_cache.get(value)
+    if plaintext is None:
+        plaintext = decrypt(value)
+        decrypted_cache.set(value, plaintext)
+    return plaintext
@@ -0,0 +1,72 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .storage import sharded_name
+
+# python-docx, docx2pdf and the COM bindings are only needed when a contract
+# is generated, so they are imported on first use rather than at worker boot.
+
+
+def build_contract_docx(user_name, recipient_name, filename):
+    """Render the contract and save it to storage, returning the stored name."""
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading("Contract Agreement", level=1)
+    doc.add_paragraph(f"Party 1: {user_name}")
+    doc.add_paragraph(f"Party 2: {recipient_name}")
+    doc.add_paragraph("\nThis agreement is binding and requires signatures.")
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return default_storage.save(sharded_name(filename), ContentFile(buffer.getvalue()))
+
+
+def convert_to_pdf(docx_path, pdf_path):
+    from docx2pdf import convert
+
+    if os.name != "nt":
+        convert(docx_path, pdf_path)
+        return
+
+    # Word automation needs COM initialised on the calling thread, not just
+    # once at import time in whichever thread happened to load the module.
+    import ctypes
+
+    ole32 = ctypes.windll.ole32
+    ole32.CoInitialize(None)
+    try:
+        convert(docx_path, pdf_path)
+    finally:
+        ole32.CoUninitialize()
+
+
+def convert_stored_docx(docx_name):
+    """Convert a stored .docx to PDF and return the stored PDF's name.
+
+    docx2pdf needs real files, so remote storages are staged through a
+    temporary directory, streaming in both directions.
+    """
+    pdf_name = sharded_name(os.path.splitext(os.path.basename(docx_name))[0] + ".pdf")
+    with tempfile.TemporaryDirectory() as tmp:
+        docx_path = os.path.join(tmp, os.path.basename(docx_name))
+        pdf_path = os.path.splitext(docx_path)[0] + ".pdf"
+        with default_storage.open(docx_name, "rb") as src, open(docx_path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        convert_to_pdf(docx_path, pdf_path)
+        with open(pdf_path, "rb") as f:
+            # Never overwrite: a .docx removed by retention can be generated
+            # again under the same name, while its first PDF is still kept.
+            return default_storage.save(pdf_name, File(f))
+
+
+def warm_up():
+    """Import the document libraries up front, e.g. in a preloading master."""
+    import docx  # noqa: F401
+    import docx2pdf  # noqa: F401
@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+
+from .circuit_breaker import CircuitBreaker, CircuitOpen
+from .rate_limit import INTERACTIVE, RateLimited, limiter
+
+breaker = CircuitBreaker(
+    "docusign",
+    failure_threshold=settings.DOCUSIGN_BREAKER_FAILURES,
+    slow_call_seconds=settings.DOCUSIGN_BREAKER_SLOW_CALL,
+    reset_timeout=settings.DOCUSIGN_BREAKER_RESET_TIMEOUT,
+)
+
+
+class DocusignUnavailable(Exception):
+    pass
+
+
+class DocusignResponseLost(DocusignUnavailable):
+    """The request went out but no response came back, so it may have taken effect."""
+
+
+def _never_sent(error):
+    import requests
+    from urllib3.exceptions import NewConnectionError
+
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def docusign_request(method, url, account_id, priority=INTERACTIVE, prepaid=False, **kwargs):
+    """Make a DocuSign REST call that counts against the account's rate limit.
+
+    Raises :class:`DocusignUnavailable` when the circuit breaker is open or the
+    call fails at the transport level, so callers can defer the work instead
+    of holding a worker while DocuSign is down. Failures after the request may
+    have reached DocuSign raise :class:`DocusignResponseLost` instead.
+    Pass ``prepaid=True`` when the caller already spent the rate-limit token.
+    """
+    if not prepaid:
+        wait = limiter.acquire(account_id, priority=priority)
+        if wait:
+            raise RateLimited(account_id, wait)
+    try:
+        breaker.before_call()
+    except CircuitOpen as e:
+        raise DocusignUnavailable(str(e)) from e
+
+    import requests
+
+    kwargs.setdefault("timeout", settings.DOCUSIGN_HTTP_TIMEOUT)
+    started = time.monotonic()
+    try:
+        response = requests.request(method, url, **kwargs)
+    except requests.RequestException as e:
+        breaker.record(False, time.monotonic() - started)
+        if _never_sent(e):
+            raise DocusignUnavailable(f"DocuSign request failed: {e}") from e
+        raise DocusignResponseLost(f"DocuSign request failed: {e}") from e
+    breaker.record(response.status_code < 500, time.monotonic() - started)
+    limiter.update_from_headers(account_id, response.headers)
+    return response
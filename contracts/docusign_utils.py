@@ -1,11 +1,19 @@
 import base64
-from docusign_esign import ApiClient, EnvelopesApi, EnvelopeDefinition, Document, Signer, SignHere, Tabs
 from django.conf import settings
 
+from .jwt_auth import get_jwt_token
+
 def send_contract_for_signing(user_email, recipient_email):
+    # The SDK pulls in hundreds of generated model modules; load it on use.
+    from docusign_esign import ApiClient, EnvelopesApi, EnvelopeDefinition, Document, Signer, SignHere, Tabs
+
     api_client = ApiClient()
     api_client.host = "https://demo.docusign.net/restapi"
-    api_client.set_default_header("Authorization", f"Bearer {settings.DOCUSIGN_ACCESS_TOKEN}")
+    if settings.DOCUSIGN_IMPERSONATED_USER_ID:
+        access_token, account_id = get_jwt_token()
+    else:
+        access_token, account_id = settings.DOCUSIGN_ACCESS_TOKEN, settings.DOCUSIGN_ACCOUNT_ID
+    api_client.set_default_header("Authorization", f"Bearer {access_token}")
 
     envelopes_api = EnvelopesApi(api_client)
 
@@ -34,5 +42,6 @@ def send_contract_for_signing(user_email, recipient_email):
         status="sent"
     )
 
-    response = envelopes_api.create_envelope(account_id=settings.DOCUSIGN_ACCOUNT_ID, envelope_definition=envelope_definition)
-    return f"https://demo.docusign.net/Signing/?envelope_id={response.envelope_id}"
\ No newline at end of file
+    response = envelopes_api.create_envelope(account_id=account_id, envelope_definition=envelope_definition)
+    # Signing URLs are created per recipient on demand, see contracts.signing.
+    return response.envelope_id
\ No newline at end of file
@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+
+COLUMNS = [
+    "id", "document_id", "sender", "user_name", "recipient_name",
+    "recipient_email", "status", "is_signed", "created_at",
+]
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+CHUNK_SIZE = 2000
+
+
+class ExportError(Exception):
+    pass
+
+
+def filter_contracts(queryset, created_from=None, created_to=None, status=None, sender=None, after_id=None):
+    """Apply export filters. ``after_id`` resumes an export past the last row seen."""
+    if created_from:
+        queryset = queryset.filter(created_at__gte=created_from)
+    if created_to:
+        queryset = queryset.filter(created_at__lt=created_to)
+    if status == "signed":
+        queryset = queryset.filter(is_signed=True)
+    elif status == "sent":
+        queryset = queryset.filter(is_signed=False, document_id__isnull=False)
+    elif status == "unsent":
+        queryset = queryset.filter(document_id__isnull=True)
+    elif status:
+        raise ExportError(f"Unknown status {status!r}")
+    if sender:
+        sender_id = get_user_model().objects.filter(username=sender).values_list("id", flat=True).first()
+        if sender_id is None:
+            # filter(sender_id=None) would match every contract without a sender.
+            return queryset.none()
+        queryset = queryset.filter(sender_id=sender_id)
+    if after_id:
+        queryset = queryset.filter(id__gt=after_id)
+    return queryset.order_by("id")
+
+
+def iter_records(queryset, chunk_size=CHUNK_SIZE):
+    # Usernames are looked up separately, not joined: with TenantRouter the
+    # contracts and the users may be on different databases.
+    usernames = {}
+    User = get_user_model()
+    rows = queryset.values_list(
+        "id", "document_id", "sender_id", "user_name", "recipient_name",
+        "recipient_email", "is_signed", "created_at",
+    ).iterator(chunk_size=chunk_size)
+    for contract_id, document_id, sender_id, user_name, recipient_name, recipient_email, is_signed, created_at in rows:
+        if sender_id is not None and sender_id not in usernames:
+            usernames[sender_id] = User.objects.filter(id=sender_id).values_list("username", flat=True).first()
+        yield {
+            "id": contract_id,
+            "document_id": document_id,
+            "sender": usernames.get(sender_id),
+            "user_name": user_name,
+            "recipient_name": recipient_name,
+            "recipient_email": recipient_email,
+            "status": "signed" if is_signed else "sent" if document_id else "unsent",
+            "is_signed": is_signed,
+            "created_at": created_at.isoformat() if created_at else None,
+        }
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(records, header=True):
+    writer = csv.writer(_Echo())
+    if header:
+        yield writer.writerow(COLUMNS)
+    for record in records:
+        yield writer.writerow([record[c] for c in COLUMNS])
+
+
+def stream_jsonl(records):
+    for record in records:
+        yield json.dumps(record) + "\n"
+
+
+def stream_parquet(records, row_group_size=CHUNK_SIZE):
+    """Write Parquet one row group at a time, yielding bytes as they are ready."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()), ("document_id", pa.string()), ("sender", pa.string()),
+        ("user_name", pa.string()), ("recipient_name", pa.string()),
+        ("recipient_email", pa.string()), ("status", pa.string()),
+        ("is_signed", pa.bool_()), ("created_at", pa.string()),
+    ])
+    buffer = io.BytesIO()
+    writer = pq.ParquetWriter(buffer, schema, compression="zstd")
+
+    def drain():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == row_group_size:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            batch = []
+            yield drain()
+    if batch:
+        writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    writer.close()
+    yield drain()
+
+
+def stream_export(queryset, fmt, header=True):
+    """Return an iterator of str (csv, jsonl) or bytes (parquet) chunks."""
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format {fmt!r}")
+    if fmt == "parquet":
+        import importlib.util
+
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ExportError("Parquet export requires pyarrow to be installed")
+    records = iter_records(queryset)
+    if fmt == "csv":
+        return stream_csv(records, header=header)
+    if fmt == "jsonl":
+        return stream_jsonl(records)
+    return stream_parquet(records)
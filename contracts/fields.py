@@ -0,0 +1,22 @@
+from django.db import models
+
+from .crypto import decrypt_cached, encrypt, is_encrypted
+
+
+class EncryptedTextField(models.TextField):
+    """TextField stored envelope-encrypted with AES-GCM.
+
+    Values written before encryption was enabled are read back as-is until
+    they are saved again.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        if is_encrypted(value):
+            return decrypt_cached(value)
+        return value
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None or is_encrypted(value):
+            return value
+        return encrypt(value)
@@ -0,0 +1,137 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+# Tokens are refreshed this many seconds before DocuSign expires them so a
+# request started just before expiry never goes out with a dead token.
+TOKEN_REFRESH_MARGIN = 300
+ASSERTION_LIFETIME = 3600
+
+_private_key = None
+_registry_lock = threading.Lock()
+_user_locks = {}
+_assertions = {}
+_tokens = {}
+
+
+class JWTGrantError(Exception):
+    pass
+
+
+def _oauth_host():
+    return settings.DOCUSIGN_OAUTH_BASE.replace("https://", "").replace("http://", "").rstrip("/")
+
+
+def _load_private_key():
+    global _private_key
+    if _private_key is None:
+        with open(settings.DOCUSIGN_PRIVATE_KEY_PATH, "rb") as f:
+            _private_key = f.read()
+    return _private_key
+
+
+def _lock_for(user_id):
+    with _registry_lock:
+        lock = _user_locks.get(user_id)
+        if lock is None:
+            lock = _user_locks[user_id] = threading.Lock()
+        return lock
+
+
+def build_assertion(user_id, now=None):
+    now = int(now or time.time())
+    cached = _assertions.get(user_id)
+    if cached and cached[1] - TOKEN_REFRESH_MARGIN > now:
+        return cached[0]
+
+    expires_at = now + ASSERTION_LIFETIME
+    payload = {
+        "iss": settings.DOCUSIGN_CLIENT_ID,
+        "sub": user_id,
+        "aud": _oauth_host(),
+        "iat": now,
+        "exp": expires_at,
+        "scope": settings.DOCUSIGN_JWT_SCOPES,
+        "jti": uuid.uuid4().hex,
+    }
+    import jwt
+
+    assertion = jwt.encode(payload, _load_private_key(), algorithm="RS256")
+    _assertions[user_id] = (assertion, expires_at)
+    return assertion
+
+
+def _request_token(user_id):
+    import requests
+
+    response = requests.post(
+        f"{settings.DOCUSIGN_OAUTH_BASE}/oauth/token",
+        data={
+            "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
+            "assertion": build_assertion(user_id),
+        },
+        timeout=settings.DOCUSIGN_HTTP_TIMEOUT,
+    )
+    if response.status_code != 200:
+        # A rejected assertion must not be reused on the next attempt.
+        _assertions.pop(user_id, None)
+        raise JWTGrantError(f"JWT grant failed for {user_id}: {response.status_code} {response.text}")
+    token_data = response.json()
+    access_token = token_data["access_token"]
+    expires_at = time.time() + int(token_data["expires_in"])
+
+    cached = _tokens.get(user_id)
+    if cached:
+        account_id, base_uri = cached["account_id"], cached["base_uri"]
+    else:
+        account_id, base_uri = _fetch_account(access_token)
+
+    _tokens[user_id] = {
+        "access_token": access_token,
+        "account_id": account_id,
+        "base_uri": base_uri,
+        "expires_at": expires_at,
+    }
+    return _tokens[user_id]
+
+
+def _fetch_account(access_token):
+    import requests
+
+    response = requests.get(
+        f"{settings.DOCUSIGN_OAUTH_BASE}/oauth/userinfo",
+        headers={"Authorization": f"Bearer {access_token}"},
+        timeout=settings.DOCUSIGN_HTTP_TIMEOUT,
+    )
+    if response.status_code != 200:
+        raise JWTGrantError(f"Failed to get user info from DocuSign: {response.status_code}")
+    accounts = response.json()["accounts"]
+    account = next((a for a in accounts if a.get("is_default")), accounts[0])
+    return account["account_id"], account["base_uri"]
+
+
+def _is_fresh(entry):
+    return entry is not None and entry["expires_at"] - TOKEN_REFRESH_MARGIN > time.time()
+
+
+def get_jwt_token(user_id=None):
+    """Return ``(access_token, account_id)`` for the impersonated DocuSign user.
+
+    Tokens are cached process-wide and shared by every thread; only one thread
+    per user talks to the OAuth server when the cached token needs renewing.
+    """
+    user_id = user_id or settings.DOCUSIGN_IMPERSONATED_USER_ID
+    entry = _tokens.get(user_id)
+    if not _is_fresh(entry):
+        with _lock_for(user_id):
+            entry = _tokens.get(user_id)
+            if not _is_fresh(entry):
+                entry = _request_token(user_id)
+    return entry["access_token"], entry["account_id"]
+
+
+def clear_cache():
+    _assertions.clear()
+    _tokens.clear()
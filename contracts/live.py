@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SEQ_KEY = "contracts:events:seq"
+EVENT_TTL = 300
+# Most events a relay catches up on after a stall; older ones are skipped.
+MAX_BACKLOG = 1000
+
+
+def _event_key(seq):
+    return f"contracts:events:{seq}"
+
+
+def publish(event):
+    """Record a status event for every process's hub to pick up.
+
+    Events go through the default cache, so a save in one worker reaches
+    browsers connected to another only when that cache is shared between
+    processes; with a per-process backend such as locmem each worker sees
+    just its own saves (the deploy check contracts.E003 flags this).
+    """
+    cache.add(SEQ_KEY, 0, timeout=None)
+    seq = cache.incr(SEQ_KEY)
+    cache.set(_event_key(seq), event, EVENT_TTL)
+
+
+def events_visible_to(user):
+    """Event filter matching Contract.objects.visible_to(user)."""
+    organization_id, user_id = user.organization_id, user.pk
+
+    def accepts(event):
+        if organization_id:
+            return event.get("organization_id") == organization_id
+        return event.get("organization_id") is None and event.get("sender_id") == user_id
+
+    return accepts
+
+
+class Subscriber:
+    def __init__(self, maxsize, accepts):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.accepts = accepts
+        self.dropped = 0
+
+    def offer(self, event):
+        if not self.accepts(event):
+            return
+        # A slow client loses its oldest events rather than growing without
+        # bound; the browser only needs each contract's latest status anyway.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class Hub:
+    """Fan status events out to every stream connected to this process.
+
+    One relay task per process polls the shared event log, however many
+    clients are connected; each idle client costs only a queue and a
+    suspended coroutine.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self._relay = None
+        self._last_seq = None
+
+    def subscribe(self, accepts):
+        subscriber = Subscriber(settings.LIVE_STATUS_BUFFER, accepts)
+        self.subscribers.add(subscriber)
+        loop = asyncio.get_running_loop()
+        if self._relay is None or self._relay.done() or self._relay.get_loop() is not loop:
+            self._relay = loop.create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def _poll(self):
+        seq = cache.get(SEQ_KEY, 0)
+        if self._last_seq is None or seq < self._last_seq:
+            self._last_seq = seq
+            return []
+        if seq == self._last_seq:
+            return []
+        start = max(self._last_seq + 1, seq - MAX_BACKLOG)
+        keys = [_event_key(n) for n in range(start, seq + 1)]
+        self._last_seq = seq
+        found = cache.get_many(keys)
+        return [found[key] for key in keys if key in found]
+
+    async def _run(self):
+        while self.subscribers:
+            try:
+                # A plain worker thread: the relay outlives the request that
+                # started it, so it must not borrow that request's executor.
+                events = await asyncio.to_thread(self._poll)
+            except Exception:
+                logger.exception("Live status relay failed to poll events")
+                events = []
+            for event in events:
+                for subscriber in list(self.subscribers):
+                    subscriber.offer(event)
+            await asyncio.sleep(settings.LIVE_STATUS_POLL_INTERVAL)
+        self._last_seq = None
+
+
+hub = Hub()
+
+
+def format_sse(event):
+    # Routing fields stay server-side; the page only needs the row's status.
+    data = {key: event[key] for key in ("id", "document_id", "is_signed")}
+    return f"event: status\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream(accepts):
+    # Subscribed on the first iteration, so a response that is never
+    # streamed leaves nothing behind for unsubscribe to clean up.
+    subscriber = hub.subscribe(accepts)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), settings.LIVE_STATUS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing idle connections.
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        hub.unsubscribe(subscriber)
@@ -0,0 +1,49 @@
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter so nothing is already imported.
+CHILD = """
+import json, os, resource, sys, time
+sys.path.insert(0, {base_dir!r})
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+started = time.perf_counter()
+import config.wsgi
+import config.urls
+if {warm!r}:
+    from contracts.startup import warm_up
+    warm_up()
+elapsed = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "rss_kb": rss_kb, "modules": len(sys.modules)}}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure worker startup time and peak RSS, with and without warm-up."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+
+    def _measure(self, warm, runs):
+        code = CHILD.format(base_dir=str(settings.BASE_DIR), warm=warm)
+        samples = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+        return {
+            "median_ms": round(statistics.median(s["seconds"] for s in samples) * 1000, 1),
+            "max_rss_mb": round(max(s["rss_kb"] for s in samples) / 1024, 1),
+            "modules": samples[-1]["modules"],
+        }
+
+    def handle(self, *args, **options):
+        for label, warm in (("lazy worker boot", False), ("preloaded master", True)):
+            result = self._measure(warm, options["runs"])
+            self.stdout.write(
+                f"{label:<18} {result['median_ms']:>8} ms  {result['max_rss_mb']:>6} MB  {result['modules']} modules"
+            )
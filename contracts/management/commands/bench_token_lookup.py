@@ -0,0 +1,69 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from contracts.crypto import decrypted_cache
+from contracts.models import DocusignProfile
+from contracts.views import get_user_token
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure get_user_token latency with encrypted tokens and fail if it exceeds the budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+        parser.add_argument("--budget-ms", type=float, default=settings.TOKEN_LOOKUP_BUDGET_MS,
+                            help="Maximum allowed p95 latency of a cached lookup.")
+
+    def _time(self, func, iterations):
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+    def _lookup(self, user_id):
+        # A fresh user instance each time so the profile is really fetched.
+        user = get_user_model().objects.get(id=user_id)
+        return get_user_token(user)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        results = {}
+        # Everything runs inside a transaction that is rolled back at the end.
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create(username="bench-token-lookup", email="bench@example.invalid")
+                DocusignProfile.objects.create(
+                    user=user, access_token="a" * 600, refresh_token="r" * 600, account_id="bench",
+                    token_expiry=timezone.now() + timedelta(hours=1),
+                )
+
+                def cold():
+                    decrypted_cache.clear()
+                    self._lookup(user.id)
+
+                results["uncached decrypt"] = self._time(cold, iterations)
+                results["cached decrypt"] = self._time(lambda: self._lookup(user.id), iterations)
+                raise Rollback
+        except Rollback:
+            pass
+
+        for label, (median, p95) in results.items():
+            self.stdout.write(f"{label:<18} median {median:.3f} ms  p95 {p95:.3f} ms")
+        p95 = results["cached decrypt"][1]
+        if p95 > options["budget_ms"]:
+            raise CommandError(f"Cached token lookup p95 {p95:.3f} ms exceeds budget of {options['budget_ms']} ms")
+        self.stdout.write(f"Within budget of {options['budget_ms']} ms.")
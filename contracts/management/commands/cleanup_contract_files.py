@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from contracts.retention import Cleaner
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete generated contract files past their retention period, plus orphaned files. "
+        "Meant to run from cron; prints what would be reclaimed unless --commit is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--commit", action="store_true", help="Actually delete files (default is a dry run).")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--pause", type=float, default=0.5, help="Seconds to sleep between delete batches.")
+
+    def handle(self, *args, **options):
+        report = Cleaner(
+            dry_run=not options["commit"],
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+        ).run()
+        verb = "Deleted" if options["commit"] else "Would delete"
+        for kind, (count, size) in sorted(report.by_kind.items()):
+            self.stdout.write(f"  {kind:<14} {count:>8} file(s) {size / 1024 / 1024:>10.1f} MB")
+        self.stdout.write(f"{verb} {report.files} file(s), reclaiming {report.bytes / 1024 / 1024:.1f} MB.")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from contracts.audit import collect_audit_events
+from contracts.views import get_sender_token
+
+
+class Command(BaseCommand):
+    help = "Fetch DocuSign audit events for completed envelopes that have not been collected yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--limit", type=int, help="Stop after this many envelopes.")
+        parser.add_argument(
+            "--max-wait", type=float, default=30.0,
+            help="Seconds to wait for rate-limit tokens before leaving the rest for the next run.",
+        )
+
+    def handle(self, *args, **options):
+        envelopes, events = collect_audit_events(
+            get_sender_token,
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            limit=options["limit"],
+            max_wait=options["max_wait"],
+        )
+        self.stdout.write(f"Collected {events} audit event(s) from {envelopes} envelope(s).")
@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+
+from contracts.export import ExportError, FORMATS, filter_contracts, stream_export
+from contracts.models import Contract
+
+
+def truncate_partial_row(path, block_size=64 * 1024):
+    """Cut a partially written final row off a csv/jsonl export.
+
+    Rows end with a newline, so everything after the last one is the row an
+    interrupted run was writing. Returns the number of bytes removed.
+    """
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        keep = 0
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline != -1:
+                keep = start + newline + 1
+                break
+            position = start
+        if keep < end:
+            f.truncate(keep)
+        return end - keep
+
+
+def last_exported_id(path, fmt):
+    """Find the id of the final complete row of a csv/jsonl export."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 64 * 1024))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    for line in reversed(lines):
+        try:
+            if fmt == "jsonl":
+                return int(json.loads(line)["id"])
+            return int(line.split(b",", 1)[0])
+        except (ValueError, KeyError):
+            continue
+    return 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream contracts to a CSV, JSON Lines or Parquet file in constant memory. "
+        "Interrupted csv/jsonl exports continue where they stopped with --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--output", help="File to write; defaults to stdout for csv and jsonl.")
+        parser.add_argument("--from", dest="created_from", help="Created on or after (ISO date/datetime).")
+        parser.add_argument("--to", dest="created_to", help="Created before (ISO date/datetime).")
+        parser.add_argument("--status", choices=["signed", "sent", "unsent"])
+        parser.add_argument("--sender", help="Username of the sender.")
+        parser.add_argument("--organization", help="Organization slug.")
+        parser.add_argument("--after-id", type=int, default=0)
+        parser.add_argument("--resume", action="store_true", help="Append to --output after its last row.")
+
+    def _date(self, value):
+        if not value:
+            return None
+        parsed = parse_datetime(value) or parse_date(value)
+        if parsed is None:
+            raise CommandError(f"Invalid date {value!r}")
+        return parsed
+
+    def handle(self, *args, **options):
+        fmt, output = options["format"], options["output"]
+        if fmt == "parquet" and not output:
+            raise CommandError("Parquet exports need --output.")
+        after_id = options["after_id"]
+        resuming = options["resume"] and output and os.path.exists(output)
+        if resuming:
+            if fmt == "parquet":
+                raise CommandError("Parquet files cannot be appended to; start a new file with --after-id.")
+            dropped = truncate_partial_row(output)
+            if dropped:
+                self.stderr.write(f"Dropped {dropped} byte(s) of a partially written row from {output}.")
+            after_id = last_exported_id(output, fmt)
+            # Nothing complete survived, not even the csv header: start over.
+            resuming = os.path.getsize(output) > 0
+
+        queryset = Contract.objects.all()
+        if options["organization"]:
+            from accounts.models import Organization
+
+            organization = Organization.objects.filter(slug=options["organization"]).first()
+            if organization is None:
+                raise CommandError(f"Unknown organization {options['organization']!r}")
+            queryset = Contract.objects.for_organization(organization)
+        try:
+            queryset = filter_contracts(
+                queryset,
+                created_from=self._date(options["created_from"]),
+                created_to=self._date(options["created_to"]),
+                status=options["status"],
+                sender=options["sender"],
+                after_id=after_id,
+            )
+            chunks = stream_export(queryset, fmt, header=not resuming and not after_id)
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        binary = fmt == "parquet"
+        if output:
+            mode = ("ab" if binary else "a") if resuming else ("wb" if binary else "w")
+            stream = open(output, mode, **({} if binary else {"newline": "", "encoding": "utf-8"}))
+        else:
+            stream = sys.stdout
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+        finally:
+            if output:
+                stream.close()
+        if output:
+            self.stderr.write(f"Exported to {output}" + (f", resumed after id {after_id}" if resuming else "") + ".")
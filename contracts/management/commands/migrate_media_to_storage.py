@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management.base import BaseCommand
+
+from contracts.models import Contract
+from contracts.storage import SHARD_ROOT, sharded_name
+
+
+class Command(BaseCommand):
+    help = "Copy contract files from the legacy flat media/ directory into sharded default storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default=settings.MEDIA_ROOT)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--delete", action="store_true", help="Remove the source file after a verified copy.")
+
+    def _move(self, source, name):
+        target = sharded_name(name)
+        if not default_storage.exists(target):
+            with source.open(name, "rb") as f:
+                target = default_storage.save(target, f)
+        if default_storage.size(target) != source.size(name):
+            raise IOError(f"size mismatch copying {name} to {target}")
+        if self.delete_source:
+            source.delete(name)
+        return target
+
+    def _migrate_field(self, pool, source, contracts, field):
+        futures = {}
+        for contract in contracts:
+            name = getattr(contract, field).name
+            if not name or name.startswith(SHARD_ROOT + "/") or not source.exists(name):
+                continue
+            futures[pool.submit(self._move, source, name)] = contract
+        moved = []
+        for future in as_completed(futures):
+            contract = futures[future]
+            try:
+                setattr(contract, field, future.result())
+                moved.append(contract)
+            except Exception as e:
+                self.stderr.write(f"Contract {contract.id}: {e}")
+        Contract.objects.bulk_update(moved, [field])
+        return len(moved)
+
+    def handle(self, *args, **options):
+        source = FileSystemStorage(location=options["source"])
+        self.delete_source = options["delete"]
+        batch_size = options["batch_size"]
+        moved = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            last_id = 0
+            while True:
+                batch = list(Contract.objects.filter(id__gt=last_id).order_by("id")[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                for field in ("contract_file", "pdf_file"):
+                    moved += self._migrate_field(pool, source, batch, field)
+        self.stdout.write(f"Moved {moved} file(s) into sharded storage.")
+
+        referenced = set(Contract.objects.values_list("contract_file", flat=True))
+        referenced.update(Contract.objects.values_list("pdf_file", flat=True))
+        _, files = source.listdir("")
+        unreferenced = [f for f in files if f not in referenced]
+        if unreferenced:
+            self.stdout.write(f"{len(unreferenced)} file(s) in {os.path.abspath(options['source'])} have no contract and were left in place.")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+from contracts.crypto import current_kek_id, encrypt, is_encrypted, rewrap
+from contracts.models import DocusignProfile
+
+TOKEN_FIELDS = ("access_token", "refresh_token")
+
+
+class Command(BaseCommand):
+    help = "Re-wrap stored DocuSign token data keys under the current key-encryption key."
+
+    def handle(self, *args, **options):
+        kek_id = current_kek_id()
+        # Cast to a plain TextField to read the stored ciphertext undecrypted.
+        rows = DocusignProfile.objects.annotate(
+            **{f"raw_{name}": Cast(name, TextField()) for name in TOKEN_FIELDS}
+        ).values_list("id", *(f"raw_{name}" for name in TOKEN_FIELDS))
+        rotated = 0
+        for profile_id, *values in rows.iterator(chunk_size=500):
+            updates = {
+                name: rewrap(value, kek_id) if is_encrypted(value) else encrypt(value, kek_id)
+                for name, value in zip(TOKEN_FIELDS, values)
+                if not value.startswith(f"enc:v1:{kek_id}:")
+            }
+            if updates:
+                DocusignProfile.objects.filter(id=profile_id).update(**updates)
+                rotated += 1
+        self.stdout.write(f"Re-wrapped tokens for {rotated} profile(s) under key {kek_id!r}.")
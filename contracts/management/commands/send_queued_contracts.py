@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+
+from accounts.tenancy import tenant_databases
+from contracts.docusign_client import breaker, DocusignUnavailable
+from contracts.models import Contract, SendStatus
+from contracts.rate_limit import BULK, FairScheduler, RateLimited
+from contracts.views import envelope_sent, find_sent_envelope, get_sender_token, send_envelope
+
+
+class Command(BaseCommand):
+    help = "Send contracts that were queued while DocuSign was unavailable."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100)
+        parser.add_argument(
+            "--max-wait", type=float, default=30.0,
+            help="Seconds to wait for rate-limit tokens before leaving the rest for the next run.",
+        )
+
+    def handle(self, *args, **options):
+        self.stopped = False
+        # Accounts take turns, so one sender's backlog cannot starve the rest.
+        scheduler = FairScheduler()
+        for contract in self.queued(options["limit"]):
+            token_account = get_sender_token(contract)
+            if not token_account:
+                self.stderr.write(f"Contract {contract.id}: no DocuSign credentials for {contract.sender}")
+                continue
+            access_token, account_id = token_account
+            scheduler.submit(account_id, self.send, contract, access_token, account_id, priority=BULK)
+        sent = scheduler.run(max_wait=options["max_wait"]).count(True)
+        if len(scheduler):
+            self.stderr.write(f"Left {len(scheduler)} contract(s) for the next run: rate limit reached.")
+        self.stdout.write(f"Sent {sent} queued contract(s); breaker is {breaker.state}.")
+
+    def queued(self, limit):
+        # Queued contracts may sit on any tenant database.
+        for using in tenant_databases():
+            if limit <= 0:
+                return
+            contracts = list(
+                Contract.objects.using(using).with_senders()
+                .filter(send_status__in=[SendStatus.QUEUED, SendStatus.UNCONFIRMED])
+                .order_by("id")[:limit]
+            )
+            limit -= len(contracts)
+            yield from contracts
+
+    def send(self, contract, access_token, account_id):
+        if self.stopped:
+            return False
+        try:
+            if contract.send_status == SendStatus.UNCONFIRMED:
+                envelope_id = find_sent_envelope(contract, access_token, account_id, priority=BULK)
+                if envelope_id:
+                    envelope_sent(contract, envelope_id, access_token, account_id)
+                    return True
+            response = send_envelope(contract, access_token, account_id, priority=BULK)
+        except RateLimited as e:
+            # Only this account is out of tokens; it stays queued for the next run.
+            self.stderr.write(f"Contract {contract.id}: {e}")
+            return False
+        except DocusignUnavailable as e:
+            # Leave the rest queued; the next run picks them up.
+            self.stderr.write(f"Stopping: {e}")
+            self.stopped = True
+            return False
+        except FileNotFoundError as e:
+            self.stderr.write(f"Contract {contract.id}: missing PDF {e}")
+            return False
+        if response.status_code == 201:
+            return True
+        self.stderr.write(f"Contract {contract.id}: {response.status_code} {response.text}")
+        return False
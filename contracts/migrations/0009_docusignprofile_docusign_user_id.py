@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0008_docusignprofile_base_uri'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='docusignprofile',
+            name='docusign_user_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
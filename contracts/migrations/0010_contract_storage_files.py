@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:02
+
+import contracts.storage
+from django.db import migrations, models
+
+
+def backfill_pdf_file(apps, schema_editor):
+    # PDFs used to be derived from the .docx name at send time.
+    Contract = apps.get_model("contracts", "Contract")
+    batch = []
+    for contract in (
+        Contract.objects.filter(pdf_file="")
+        .only("id", "contract_file")
+        .iterator(chunk_size=1000)
+    ):
+        contract.pdf_file = contract.contract_file.name.replace(".docx", ".pdf")
+        batch.append(contract)
+        if len(batch) == 1000:
+            Contract.objects.bulk_update(batch, ["pdf_file"])
+            batch = []
+    Contract.objects.bulk_update(batch, ["pdf_file"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contracts", "0009_docusignprofile_docusign_user_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contract",
+            name="pdf_file",
+            field=models.FileField(
+                blank=True,
+                max_length=255,
+                upload_to=contracts.storage.contract_upload_to,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="contract",
+            name="contract_file",
+            field=models.FileField(
+                max_length=255, upload_to=contracts.storage.contract_upload_to
+            ),
+        ),
+        migrations.RunPython(backfill_pdf_file, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def backfill_sender(apps, schema_editor):
+    # Contracts used to find their owner by matching user_name to a username.
+    Contract = apps.get_model("contracts", "Contract")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    names = list(
+        Contract.objects.filter(sender__isnull=True)
+        .values_list("user_name", flat=True)
+        .distinct()
+        .order_by("user_name")
+    )
+    for start in range(0, len(names), BATCH_SIZE):
+        users = User.objects.filter(username__in=names[start : start + BATCH_SIZE])
+        for user_id, username in users.values_list("id", "username"):
+            Contract.objects.filter(sender__isnull=True, user_name=username).update(
+                sender_id=user_id
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contracts", "0011_contract_sender"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sender, migrations.RunPython.noop),
+    ]
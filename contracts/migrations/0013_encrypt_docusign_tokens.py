@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:07
+
+import contracts.fields
+from django.db import migrations
+
+
+def encrypt_existing_tokens(apps, schema_editor):
+    # Plaintext values load unchanged and are encrypted on the way back in.
+    DocusignProfile = apps.get_model("contracts", "DocusignProfile")
+    profiles = DocusignProfile.objects.only("id", "access_token", "refresh_token")
+    batch = []
+    for profile in profiles.iterator(chunk_size=500):
+        batch.append(profile)
+        if len(batch) == 500:
+            DocusignProfile.objects.bulk_update(batch, ["access_token", "refresh_token"])
+            batch = []
+    DocusignProfile.objects.bulk_update(batch, ["access_token", "refresh_token"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contracts", "0012_backfill_contract_sender"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="docusignprofile",
+            name="access_token",
+            field=contracts.fields.EncryptedTextField(),
+        ),
+        migrations.AlterField(
+            model_name="docusignprofile",
+            name="refresh_token",
+            field=contracts.fields.EncryptedTextField(),
+        ),
+        migrations.RunPython(encrypt_existing_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_organization"),
+        ("contracts", "0014_contract_organization"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contract",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="contract",
+            index=models.Index(
+                fields=["organization", "created_at"], name="contract_org_created_idx"
+            ),
+        ),
+    ]
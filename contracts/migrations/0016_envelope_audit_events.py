@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contracts", "0015_contract_created_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditAction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=128, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AuditCollection",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("envelope_id", models.UUIDField(unique=True)),
+                ("collected_at", models.DateTimeField(auto_now_add=True)),
+                ("event_count", models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="EnvelopeAuditEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("envelope_id", models.UUIDField()),
+                ("logged_at", models.DateTimeField()),
+                ("details", models.BinaryField()),
+                (
+                    "action",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="contracts.auditaction",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["envelope_id", "logged_at"],
+                        name="audit_envelope_time_idx",
+                    )
+                ],
+            },
+        ),
+    ]
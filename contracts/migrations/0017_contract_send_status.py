@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_send_status(apps, schema_editor):
+    # Unsent contracts used to be retried blindly. Whether the sender was
+    # told their send failed is unknown, so none of them are queued again.
+    Contract = apps.get_model("contracts", "Contract")
+    Contract.objects.filter(document_id__isnull=False).update(send_status="sent")
+    Contract.objects.filter(document_id__isnull=True).update(send_status="failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_organization"),
+        ("contracts", "0016_envelope_audit_events"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contract",
+            name="send_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Sending"),
+                    ("queued", "Queued"),
+                    ("unconfirmed", "Unconfirmed"),
+                    ("failed", "Failed"),
+                    ("sent", "Sent"),
+                ],
+                default="pending",
+                max_length=16,
+            ),
+        ),
+        migrations.RunPython(backfill_send_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="contract",
+            index=models.Index(fields=["send_status"], name="contract_send_status_idx"),
+        ),
+    ]
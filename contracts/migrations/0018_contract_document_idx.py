@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_organization"),
+        ("contracts", "0017_contract_send_status"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contract",
+            index=models.Index(fields=["document_id"], name="contract_document_idx"),
+        ),
+    ]
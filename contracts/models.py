@@ -1,21 +1,141 @@
+import json
+import zlib
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .fields import EncryptedTextField
+from .storage import contract_upload_to
+
+class ContractQuerySet(models.QuerySet):
+    def for_organization(self, organization):
+        queryset = self.filter(organization=organization)
+        if organization.database != "default" and organization.database in settings.DATABASES:
+            queryset = queryset.using(organization.database)
+        return queryset
+
+    def visible_to(self, user):
+        """Contracts of the user's organization, or their own without one."""
+        if user.organization_id:
+            return self.for_organization(user.organization)
+        return self.filter(organization__isnull=True, sender=user)
+
+    def create(self, **kwargs):
+        if self._db is None:
+            # Save without a fixed alias so the router sees the instance and
+            # can place it on its organization's database.
+            obj = self.model(**kwargs)
+            obj.save(force_insert=True)
+            return obj
+        return super().create(**kwargs)
+
+    def with_senders(self):
+        # Prefetched rather than joined: with TenantRouter enabled, contracts
+        # may live on a tenant database while users stay on the default one.
+        return self.prefetch_related("organization", "sender__docusignprofile")
+
+
+class SendStatus(models.TextChoices):
+    PENDING = "pending", "Sending"
+    # DocuSign was unreachable before the request went out; send_queued_contracts retries it.
+    QUEUED = "queued", "Queued"
+    # The request went out but no response came back; the envelope may exist.
+    UNCONFIRMED = "unconfirmed", "Unconfirmed"
+    FAILED = "failed", "Failed"
+    SENT = "sent", "Sent"
+
 class Contract(models.Model):
+    # No database-level constraints so a tenant's contracts can be placed on
+    # another database than the users and organizations they point at.
+    organization = models.ForeignKey(
+        "accounts.Organization", on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="contracts", db_constraint=False,
+    )
+    sender = models.ForeignKey(
+        get_user_model(), on_delete=models.SET_NULL, null=True, blank=True, related_name="contracts",
+        db_constraint=False,
+    )
+    # Sender's name as typed on the contract form
     user_name = models.CharField(max_length=255)
     recipient_name = models.CharField(max_length=255)
     recipient_email = models.EmailField()
-    contract_file = models.FilePathField(path='media/')
+    contract_file = models.FileField(upload_to=contract_upload_to, max_length=255)
+    pdf_file = models.FileField(upload_to=contract_upload_to, max_length=255, blank=True)
     document_id = models.CharField(max_length=255, null=True, blank=True)
+    send_status = models.CharField(max_length=16, choices=SendStatus.choices, default=SendStatus.PENDING)
     is_signed = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
+
+    objects = ContractQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sender", "-id"], name="contract_sender_recent_idx"),
+            models.Index(fields=["organization", "-id"], name="contract_org_recent_idx"),
+            models.Index(fields=["organization", "sender", "-id"], name="contract_org_sender_idx"),
+            models.Index(fields=["organization", "is_signed"], name="contract_org_signed_idx"),
+            models.Index(fields=["organization", "created_at"], name="contract_org_created_idx"),
+            models.Index(fields=["send_status"], name="contract_send_status_idx"),
+            models.Index(fields=["document_id"], name="contract_document_idx"),
+        ]
 
 class DocusignProfile(models.Model):
     user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE)
-    access_token = models.TextField()
-    refresh_token = models.TextField()
+    access_token = EncryptedTextField()
+    refresh_token = EncryptedTextField()
     account_id = models.CharField(max_length=255)
     token_expiry = models.DateTimeField()
     base_uri = models.CharField(max_length=255, blank=True, null=True)
+    # DocuSign user GUID, used as the JWT ``sub`` when sending on the user's behalf
+    docusign_user_id = models.CharField(max_length=64, blank=True, null=True)
+
+    def __str__(self):
+        return self.user.username
+
+class AppendOnlyQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise TypeError(f"{self.model.__name__} rows are append-only")
+
+    def delete(self):
+        raise TypeError(f"{self.model.__name__} rows are append-only")
+
+class AuditAction(models.Model):
+    # Action names repeat across millions of events; rows reference them by id.
+    name = models.CharField(max_length=128, unique=True)
 
     def __str__(self):
-        return self.user.username
\ No newline at end of file
+        return self.name
+
+class EnvelopeAuditEvent(models.Model):
+    """One DocuSign audit event, kept apart from Contract and never modified."""
+    envelope_id = models.UUIDField()
+    logged_at = models.DateTimeField()
+    action = models.ForeignKey(AuditAction, on_delete=models.PROTECT, db_constraint=False, related_name="+")
+    # zlib-compressed JSON of the event's remaining fields
+    details = models.BinaryField()
+
+    objects = AppendOnlyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["envelope_id", "logged_at"], name="audit_envelope_time_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError("EnvelopeAuditEvent rows are append-only")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("EnvelopeAuditEvent rows are append-only")
+
+    @property
+    def fields(self):
+        return json.loads(zlib.decompress(self.details))
+
+class AuditCollection(models.Model):
+    """Marks an envelope whose audit events have been ingested."""
+    envelope_id = models.UUIDField(unique=True)
+    collected_at = models.DateTimeField(auto_now_add=True)
+    event_count = models.PositiveIntegerField()
@@ -0,0 +1,171 @@
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import caches
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+
+class RateLimited(Exception):
+    def __init__(self, account_id, retry_after):
+        super().__init__(f"DocuSign rate limit reached for account {account_id}, retry in {retry_after:.0f}s")
+        self.account_id = account_id
+        self.retry_after = retry_after
+
+
+class TokenBucketLimiter:
+    """Token buckets per DocuSign account, kept in a shared Django cache.
+
+    Two buckets are tracked per account, mirroring DocuSign's own limits: an
+    hourly quota and a short burst window. Bulk traffic may only spend tokens
+    above ``reserve`` so interactive sends still get through while a large
+    batch job is draining the quota.
+    """
+
+    def __init__(self, cache_alias=None):
+        self.cache_alias = cache_alias or settings.DOCUSIGN_RATE_LIMIT_CACHE
+        self.buckets = {
+            "hour": (settings.DOCUSIGN_RATE_LIMIT_PER_HOUR, 3600),
+            "burst": (settings.DOCUSIGN_BURST_LIMIT, settings.DOCUSIGN_BURST_WINDOW),
+        }
+        self.reserve = settings.DOCUSIGN_INTERACTIVE_RESERVE
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _key(self, account_id, name):
+        return f"docusign:ratelimit:{account_id}:{name}"
+
+    def _locked(self, account_id):
+        """Take the account's lock and return a release function.
+
+        Best effort: a stuck lock expires after two seconds, and after one
+        second of waiting we proceed without it rather than stall the request.
+        Release only removes the lock if this caller still holds it.
+        """
+        lock_key = f"docusign:ratelimit:{account_id}:lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + 1
+        while not self.cache.add(lock_key, token, timeout=2):
+            if time.monotonic() > deadline:
+                return lambda: None
+            time.sleep(0.005)
+
+        def release():
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+        return release
+
+    def _refill(self, state, capacity, period, now):
+        tokens, updated = state if state else (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * capacity / period)
+        return tokens
+
+    def acquire(self, account_id, priority=INTERACTIVE, cost=1, spend=True):
+        """Spend ``cost`` tokens and return 0, or the seconds to wait if empty.
+
+        With ``spend=False`` the buckets are only inspected.
+        """
+        now = time.time()
+        release = self._locked(account_id)
+        try:
+            states = {}
+            wait = 0.0
+            for name, (capacity, period) in self.buckets.items():
+                tokens = self._refill(self.cache.get(self._key(account_id, name)), capacity, period, now)
+                states[name] = tokens
+                floor = cost + (capacity * self.reserve if priority == BULK else 0)
+                if tokens < floor:
+                    wait = max(wait, (floor - tokens) * period / capacity)
+            if wait or not spend:
+                return wait
+            for name, (capacity, period) in self.buckets.items():
+                self.cache.set(self._key(account_id, name), (states[name] - cost, now), timeout=period)
+            return 0.0
+        finally:
+            release()
+
+    def update_from_headers(self, account_id, headers):
+        """Clamp local buckets to what DocuSign reports as remaining.
+
+        Other services sharing the account spend from the same quota, so the
+        response headers are the source of truth whenever they are present.
+        """
+        now = time.time()
+        reported = {
+            "hour": headers.get("X-RateLimit-Remaining"),
+            "burst": headers.get("X-BurstLimit-Remaining"),
+        }
+        release = self._locked(account_id)
+        try:
+            for name, remaining in reported.items():
+                if remaining is None:
+                    continue
+                capacity, period = self.buckets[name]
+                tokens = self._refill(self.cache.get(self._key(account_id, name)), capacity, period, now)
+                self.cache.set(self._key(account_id, name), (min(tokens, float(remaining)), now), timeout=period)
+        finally:
+            release()
+
+
+class FairScheduler:
+    """Round-robin queue of DocuSign calls across accounts.
+
+    Interactive jobs are always served before bulk jobs, and within a priority
+    each account gets one turn before any account gets a second one, so one
+    large sender cannot starve the rest.
+    """
+
+    def __init__(self, limiter=None):
+        self.limiter = limiter or TokenBucketLimiter()
+        self.queues = {INTERACTIVE: {}, BULK: {}}
+
+    def submit(self, account_id, func, *args, priority=BULK, **kwargs):
+        self.queues[priority].setdefault(account_id, deque()).append((func, args, kwargs))
+
+    def __len__(self):
+        return sum(len(q) for queues in self.queues.values() for q in queues.values())
+
+    def _next(self):
+        shortest_wait = None
+        for priority in (INTERACTIVE, BULK):
+            queues = self.queues[priority]
+            for account_id in list(queues):
+                # The job spends its own token when it calls docusign_request.
+                wait = self.limiter.acquire(account_id, priority=priority, spend=False)
+                if wait:
+                    shortest_wait = wait if shortest_wait is None else min(shortest_wait, wait)
+                    continue
+                # Move the account to the back so the next pick goes elsewhere.
+                queue = queues.pop(account_id)
+                job = queue.popleft()
+                if queue:
+                    queues[account_id] = queue
+                return job, 0
+        return None, shortest_wait
+
+    def run(self, max_wait=None):
+        """Run queued jobs and return their results in the order they ran.
+
+        When every account is out of tokens for longer than ``max_wait``
+        seconds, the remaining jobs are left queued and ``run`` returns.
+        """
+        results = []
+        while len(self):
+            job, wait = self._next()
+            if job is None:
+                if max_wait is not None and wait > max_wait:
+                    break
+                time.sleep(wait)
+                continue
+            func, args, kwargs = job
+            results.append(func(*args, **kwargs))
+        return results
+
+
+limiter = TokenBucketLimiter()
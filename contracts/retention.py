@@ -0,0 +1,138 @@
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from accounts.tenancy import tenant_databases
+from .models import Contract, SendStatus
+from .storage import SHARD_ROOT
+
+ARTIFACT_FIELDS = ("contract_file", "pdf_file")
+
+
+@dataclass
+class CleanupReport:
+    files: int = 0
+    bytes: int = 0
+    by_kind: dict = field(default_factory=dict)
+
+    def add(self, kind, size):
+        self.files += 1
+        self.bytes += size
+        count, total = self.by_kind.get(kind, (0, 0))
+        self.by_kind[kind] = (count + 1, total + size)
+
+
+def contract_state(contract):
+    if contract.is_signed:
+        return "signed"
+    if contract.document_id:
+        return "sent"
+    if contract.send_status in (SendStatus.QUEUED, SendStatus.UNCONFIRMED):
+        return "queued"
+    return "unsent"
+
+
+def walk_storage(path=SHARD_ROOT, storage=None):
+    storage = storage or default_storage
+    if path and not storage.exists(path):
+        return
+    dirs, files = storage.listdir(path)
+    for name in files:
+        yield f"{path}/{name}" if path else name
+    for directory in dirs:
+        yield from walk_storage(f"{path}/{directory}" if path else directory, storage)
+
+
+class Cleaner:
+    """Delete generated files that their retention policy no longer covers.
+
+    Policies come from ``settings.CONTRACT_FILE_RETENTION``: days to keep each
+    artifact per contract state (see :func:`contract_state`), measured from
+    the file's modification time (``None`` keeps it forever). Files in storage that no contract references
+    are orphans, typically left by failed conversions.
+    """
+
+    def __init__(self, dry_run=True, batch_size=500, pause=0.0, storage=None):
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.pause = pause
+        self.storage = storage or default_storage
+        self.policy = settings.CONTRACT_FILE_RETENTION
+        self.now = timezone.now()
+        self.report = CleanupReport()
+        self._pending = []
+
+    def _expired(self, name, days):
+        if days is None:
+            return False
+        return self.storage.get_modified_time(name) <= self.now - timedelta(days=days)
+
+    def _delete(self, name, kind):
+        try:
+            size = self.storage.size(name)
+        except OSError:
+            return False
+        self.report.add(kind, size)
+        if not self.dry_run:
+            self._pending.append(name)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+        return True
+
+    def _flush(self):
+        for name in self._pending:
+            self.storage.delete(name)
+        self._pending = []
+        if self.pause:
+            time.sleep(self.pause)
+
+    def expire_artifacts(self):
+        for using in tenant_databases():
+            for field_name in ARTIFACT_FIELDS:
+                self._expire_field(field_name, using)
+
+    def _expire_field(self, field_name, using):
+        cleared = []
+        contracts = Contract.objects.using(using).exclude(**{field_name: ""}).only(
+            "id", "document_id", "is_signed", "send_status", field_name
+        )
+        for contract in contracts.iterator(chunk_size=self.batch_size):
+            name = getattr(contract, field_name).name
+            # A state missing from the policy keeps its files.
+            days = self.policy[field_name].get(contract_state(contract))
+            if not self.storage.exists(name) or not self._expired(name, days):
+                continue
+            if self._delete(name, field_name):
+                cleared.append(contract.id)
+            if len(cleared) >= self.batch_size:
+                self._clear_field(field_name, cleared, using)
+                cleared = []
+        self._clear_field(field_name, cleared, using)
+
+    def _clear_field(self, field_name, ids, using):
+        if ids and not self.dry_run:
+            self._flush()
+            Contract.objects.using(using).filter(id__in=ids).update(**{field_name: ""})
+
+    def remove_orphans(self):
+        # Every tenant database shares the storage, so a file is only an
+        # orphan once no database references it.
+        referenced = set()
+        for using in tenant_databases():
+            for field_name in ARTIFACT_FIELDS:
+                contracts = Contract.objects.using(using).exclude(**{field_name: ""})
+                referenced.update(contracts.values_list(field_name, flat=True).iterator())
+        for name in walk_storage(storage=self.storage):
+            if name not in referenced and self._expired(name, self.policy["orphan"]):
+                self._delete(name, "orphan")
+
+    def run(self):
+        self.expire_artifacts()
+        self.remove_orphans()
+        if not self.dry_run:
+            self._flush()
+        return self.report
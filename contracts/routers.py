@@ -0,0 +1,24 @@
+AUDIT_MODELS = {"contracts.auditaction", "contracts.envelopeauditevent", "contracts.auditcollection"}
+
+
+class AuditRouter:
+    """Keep the audit event tables on their own database (AUDIT_DATABASE)."""
+
+    def _db_for(self, model, **hints):
+        if model._meta.label_lower in AUDIT_MODELS:
+            return "audit"
+        return None
+
+    db_for_read = _db_for
+    db_for_write = _db_for
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if model_name is None or app_label != "contracts":
+            return None
+        is_audit = f"{app_label}.{model_name}" in AUDIT_MODELS
+        if db == "audit":
+            return is_audit
+        return False if is_audit else None
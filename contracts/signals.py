@@ -0,0 +1,40 @@
+import logging
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .live import publish
+from .models import Contract
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Contract)
+@receiver(post_delete, sender=Contract)
+def invalidate_contract_row(sender, instance, **kwargs):
+    cache.delete(make_template_fragment_key("contract_row", [instance.organization_id, instance.pk]))
+
+
+@receiver(post_save, sender=Contract)
+def publish_contract_status(sender, instance, using, **kwargs):
+    event = {
+        "id": instance.pk,
+        "document_id": instance.document_id,
+        "is_signed": instance.is_signed,
+        # Each subscriber only receives events for contracts it may see.
+        "organization_id": instance.organization_id,
+        "sender_id": instance.sender_id,
+    }
+    # Sent once the save commits, so no stream shows a rolled-back status.
+    transaction.on_commit(lambda: _publish(event), using=using)
+
+
+def _publish(event):
+    try:
+        publish(event)
+    except Exception:
+        # Live updates are best effort; the saved contract must not fail.
+        logger.exception(f"Could not publish status event for contract {event['id']}")
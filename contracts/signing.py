@@ -0,0 +1,97 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.urls import reverse
+
+from .docusign_client import docusign_request
+
+logger = logging.getLogger(__name__)
+
+# DocuSign recipient view URLs are single-use and expire five minutes after
+# creation, so a cached one is only handed out while it is still fresh.
+RECIPIENT_VIEW_TTL = 240
+SIGNING_LINK_SALT = "contracts.signing"
+
+_pregenerate_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="recipient-view")
+
+
+def client_user_id(contract):
+    # Marks the signer as embedded: DocuSign expects our app to host signing.
+    return str(contract.pk)
+
+
+def signing_link(contract):
+    """Absolute link to our signing page, safe to email to the recipient.
+
+    The token carries the organization as well as the contract, since the
+    recipient is anonymous and the contract may live on a tenant database.
+    """
+    token = signing.dumps([contract.pk, contract.organization_id], salt=SIGNING_LINK_SALT)
+    return settings.SITE_URL + reverse("sign_contract", args=[token])
+
+
+def contract_id_from_token(token):
+    """Return ``(contract_id, organization_id)`` from a signing link token."""
+    value = signing.loads(token, salt=SIGNING_LINK_SALT, max_age=settings.SIGNING_LINK_MAX_AGE)
+    if isinstance(value, int):
+        # Links emailed before tokens carried the organization.
+        return value, None
+    contract_id, organization_id = value
+    return contract_id, organization_id
+
+
+def _cache_key(contract):
+    # Contract ids are only unique per database once tenants have their own.
+    return f"docusign:recipient_view:{contract.organization_id}:{contract.pk}"
+
+
+def create_recipient_view(contract, access_token, account_id):
+    url = f"{settings.DOCUSIGN_API_BASE}/v2.1/accounts/{account_id}/envelopes/{contract.document_id}/views/recipient"
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+    body = {
+        "returnUrl": settings.SITE_URL + reverse("success_page"),
+        "authenticationMethod": "none",
+        "email": contract.recipient_email,
+        "userName": contract.recipient_name,
+        "clientUserId": client_user_id(contract),
+    }
+    response = docusign_request("POST", url, account_id, headers=headers, json=body)
+    if response.status_code != 201:
+        logger.error(f"Recipient view for contract {contract.pk} failed: {response.status_code} {response.text}")
+        return None
+    return response.json().get("url")
+
+
+def get_recipient_view_url(contract, access_token, account_id):
+    """Return a signing URL, using a pre-generated one when available.
+
+    The cached URL is removed as it is handed out since DocuSign only
+    accepts each URL once.
+    """
+    key = _cache_key(contract)
+    url = cache.get(key)
+    if url:
+        cache.delete(key)
+        return url
+    return create_recipient_view(contract, access_token, account_id)
+
+
+def _pregenerate(contract, access_token, account_id):
+    try:
+        url = create_recipient_view(contract, access_token, account_id)
+    except Exception as e:
+        logger.warning(f"Could not pre-generate recipient view for contract {contract.pk}: {e}")
+        return
+    if url:
+        cache.set(_cache_key(contract), url, RECIPIENT_VIEW_TTL)
+
+
+def pregenerate_recipient_view(contract, access_token, account_id):
+    """Create the recipient view in the background for a signer expected soon."""
+    return _pregenerate_pool.submit(_pregenerate, contract, access_token, account_id)
@@ -0,0 +1,25 @@
+import os
+
+from django.conf import settings
+from django.db import connections
+
+
+def warm_up():
+    """Load heavy libraries and shared state once, before workers fork.
+
+    Meant for a preloading master (``GUNICORN_PRELOAD=1``): anything imported
+    here is shared copy-on-write by every worker instead of being loaded by
+    each of them on its first request.
+    """
+    import requests  # noqa: F401
+
+    from . import documents, jwt_auth
+
+    documents.warm_up()
+    if os.path.exists(settings.DOCUSIGN_PRIVATE_KEY_PATH):
+        import jwt  # noqa: F401
+
+        jwt_auth._load_private_key()
+
+    # Workers must not inherit the master's database sockets.
+    connections.close_all()
@@ -0,0 +1,89 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .docusign_client import docusign_request, DocusignUnavailable
+from .rate_limit import RateLimited
+
+logger = logging.getLogger(__name__)
+
+# DocuSign accepts a comma-separated list of envelope IDs on the envelope
+# listing endpoint; keep each request's query string comfortably short.
+ENVELOPES_PER_REQUEST = 50
+
+
+def _cache_key(envelope_id):
+    return f"docusign:envelope_status:{envelope_id}"
+
+
+def _fetch_statuses(access_token, account_id, envelope_ids):
+    url = f"{settings.DOCUSIGN_API_BASE}/v2.1/accounts/{account_id}/envelopes"
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+    try:
+        response = docusign_request("GET", url, account_id, headers=headers, params={"envelope_ids": ",".join(envelope_ids)})
+    except (RateLimited, DocusignUnavailable) as e:
+        logger.warning(str(e))
+        return {}
+    if response.status_code != 200:
+        logger.warning(f"Envelope status lookup failed: {response.status_code} {response.text}")
+        return {}
+    envelopes = response.json().get("envelopes") or []
+    return {e["envelopeId"]: e.get("status") for e in envelopes}
+
+
+def fetch_envelope_statuses(contracts, get_token):
+    """Return ``{envelope_id: status}`` for the given contracts.
+
+    Statuses are cached for ``ENVELOPE_STATUS_CACHE_TIMEOUT`` seconds. Cache
+    misses are grouped by sender so each token is resolved once, then looked
+    up in batches of envelope IDs, running up to
+    ``STATUS_REFRESH_CONCURRENCY`` requests at a time.
+    """
+    envelope_ids = [c.document_id for c in contracts if c.document_id]
+    statuses = {
+        key.rsplit(":", 1)[1]: value
+        for key, value in cache.get_many([_cache_key(e) for e in envelope_ids]).items()
+    }
+
+    by_sender = {}
+    for contract in contracts:
+        if contract.document_id and contract.document_id not in statuses:
+            by_sender.setdefault((contract.organization_id, contract.sender_id), []).append(contract)
+
+    # Token lookups touch the database, so they stay on this thread.
+    jobs = []
+    for sender_contracts in by_sender.values():
+        token_account = get_token(sender_contracts[0])
+        if not token_account:
+            continue
+        ids = [c.document_id for c in sender_contracts]
+        for start in range(0, len(ids), ENVELOPES_PER_REQUEST):
+            jobs.append((*token_account, ids[start:start + ENVELOPES_PER_REQUEST]))
+
+    if jobs:
+        with ThreadPoolExecutor(max_workers=min(settings.STATUS_REFRESH_CONCURRENCY, len(jobs))) as pool:
+            fetched = {}
+            for result in pool.map(lambda job: _fetch_statuses(*job), jobs):
+                fetched.update(result)
+        cache.set_many({_cache_key(e): s for e, s in fetched.items()}, settings.ENVELOPE_STATUS_CACHE_TIMEOUT)
+        statuses.update(fetched)
+    return statuses
+
+
+def refresh_contracts(contracts, get_token):
+    """Update ``is_signed`` from DocuSign and return the contracts that changed."""
+    pending = [c for c in contracts if not c.is_signed]
+    statuses = fetch_envelope_statuses(pending, get_token)
+    changed = []
+    for contract in pending:
+        if statuses.get(contract.document_id) == "completed":
+            contract.is_signed = True
+            # save() rather than bulk_update so the row cache is invalidated.
+            contract.save(update_fields=["is_signed"])
+            changed.append(contract)
+    return changed
@@ -0,0 +1,42 @@
+import base64
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+
+# Files are spread over 256 * 256 directories keyed by a hash of their name so
+# no single directory (or object-store prefix) grows without bound.
+SHARD_ROOT = "contracts"
+CHUNK_SIZE = 3 * 64 * 1024  # a multiple of 3 keeps base64 chunks padding-free
+
+
+def sharded_name(filename):
+    filename = os.path.basename(filename)
+    digest = hashlib.sha1(filename.encode("utf-8")).hexdigest()
+    return f"{SHARD_ROOT}/{digest[:2]}/{digest[2:4]}/{filename}"
+
+
+def contract_upload_to(instance, filename):
+    return sharded_name(filename)
+
+
+def iter_chunks(name, storage=None, chunk_size=CHUNK_SIZE):
+    storage = storage or default_storage
+    with storage.open(name, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def encode_file_to_base64(name, storage=None):
+    """Base64-encode a stored file, reading it a chunk at a time.
+
+    The encoded string itself is built in memory, since the envelope JSON
+    sent to DocuSign needs it whole.
+    """
+    storage = storage or default_storage
+    if not name or not storage.exists(name):
+        return None
+    return "".join(base64.b64encode(chunk).decode("ascii") for chunk in iter_chunks(name, storage))
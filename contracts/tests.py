@@ -1,3 +1,1057 @@
-from django.test import TestCase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from urllib.parse import parse_qs
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import base64
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+import requests
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Organization
+from . import audit, crypto, jwt_auth, views
+from .checks import check_shared_cache
+from .circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from .export import filter_contracts
+from .retention import Cleaner
+from .status import ENVELOPES_PER_REQUEST, refresh_contracts
+from .documents import build_contract_docx, convert_stored_docx
+from .storage import CHUNK_SIZE, SHARD_ROOT, encode_file_to_base64, sharded_name
+from .docusign_client import DocusignResponseLost, DocusignUnavailable
+from .rate_limit import BULK, INTERACTIVE, FairScheduler, TokenBucketLimiter
+from .live import Subscriber, events_visible_to, hub, stream
+from .models import AuditCollection, Contract, DocusignProfile, EnvelopeAuditEvent, SendStatus
+from .signing import SIGNING_LINK_SALT, contract_id_from_token, get_recipient_view_url, signing_link
+
+# Templates render without a collectstatic manifest.
+TEST_STORAGES = {
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None, headers=None):
+        self.status_code = status_code
+        self.data = data or {}
+        self.headers = headers or {}
+        self.text = str(self.data)
+
+    def json(self):
+        return self.data
+
+
+class DocusignStandInMixin:
+    """Fresh breaker and rate-limit state, and no real HTTP calls."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        patcher = mock.patch("contracts.docusign_client.breaker", CircuitBreaker("test"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.http = mock.patch("requests.request").start()
+        self.addCleanup(mock.patch.stopall)
+
+
+def make_contract(owner, **kwargs):
+    fields = {
+        "user_name": owner.username, "recipient_name": "Bob", "recipient_email": "bob@example.com",
+        "sender": owner, "organization": owner.organization, "pdf_file": "contract.pdf",
+    }
+    fields.update(kwargs)
+    return Contract.objects.create(**fields)
+
+
+def make_user(username="alice", **kwargs):
+    return get_user_model().objects.create_user(
+        username=username, email=f"{username}@example.com", password="pw", **kwargs
+    )
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ContractStatusStreamTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.url = reverse("contract_status_stream")
+
+    async def test_requires_login(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_not_streamed_under_wsgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 204)
+
+    def test_list_only_subscribes_under_asgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("contract_list"))
+        self.assertNotContains(response, "EventSource(")
+
+    async def test_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+        await chunks.aclose()
+
+    async def test_subscribes_only_while_streaming(self):
+        await self.async_client.aforce_login(self.user)
+        await self.async_client.get(self.url)
+        self.assertFalse(hub.subscribers)
+        events = stream(events_visible_to(self.user))
+        await anext(events)
+        self.assertEqual(len(hub.subscribers), 1)
+        await events.aclose()
+        self.assertFalse(hub.subscribers)
+
+
+class LiveStatusPublishTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+
+    def test_published_after_commit(self):
+        with mock.patch("contracts.signals.publish") as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                contract = make_contract(self.user)
+            publish.assert_not_called()
+            callbacks[0]()
+        self.assertEqual(publish.call_args.args[0]["id"], contract.id)
+
+    def test_publish_failure_does_not_fail_the_save(self):
+        with mock.patch("contracts.signals.publish", side_effect=ConnectionError("cache down")):
+            with self.assertLogs("contracts.signals", "ERROR"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    contract = make_contract(self.user)
+        self.assertTrue(Contract.objects.filter(id=contract.id).exists())
+
+    def test_deploy_check_rejects_per_process_cache(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([e.id for e in check_shared_cache(None)], ["contracts.E003"])
+        with override_settings(DEBUG=True, CACHES=locmem):
+            self.assertEqual(check_shared_cache(None), [])
+        with override_settings(DEBUG=False, CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class TenantIsolationTests(TestCase):
+    def setUp(self):
+        self.acme = Organization.objects.create(name="Acme", slug="acme")
+        self.globex = Organization.objects.create(name="Globex", slug="globex")
+        self.user = make_user(organization=self.acme)
+
+    def test_stream_only_carries_own_organization(self):
+        subscriber = Subscriber(10, events_visible_to(self.user))
+        subscriber.offer({"id": 1, "organization_id": self.globex.id, "sender_id": None})
+        subscriber.offer({"id": 2, "organization_id": self.acme.id, "sender_id": None})
+        self.assertEqual(subscriber.queue.qsize(), 1)
+        self.assertEqual(subscriber.queue.get_nowait()["id"], 2)
+
+    def test_stream_without_organization_carries_own_contracts(self):
+        loner = make_user("bob")
+        subscriber = Subscriber(10, events_visible_to(loner))
+        subscriber.offer({"id": 1, "organization_id": None, "sender_id": self.user.id})
+        subscriber.offer({"id": 2, "organization_id": None, "sender_id": loner.id})
+        self.assertEqual([subscriber.queue.get_nowait()["id"]], [2])
+        self.assertTrue(subscriber.queue.empty())
+
+    def test_signing_link_resolves_through_its_organization(self):
+        contract = Contract.objects.create(
+            organization=self.acme, sender=self.user, user_name="a", recipient_name="b",
+            recipient_email="b@example.com", document_id="env-1",
+        )
+        token = signing_link(contract).rsplit("/", 2)[-2]
+        self.assertEqual(contract_id_from_token(token), (contract.id, self.acme.id))
+        # Found, then stopped only because the sender never connected DocuSign.
+        self.assertEqual(self.client.get(reverse("sign_contract", args=[token])).status_code, 503)
+
+        forged = signing.dumps([contract.id, self.globex.id], salt=SIGNING_LINK_SALT)
+        self.assertEqual(self.client.get(reverse("sign_contract", args=[forged])).status_code, 404)
+
+    def test_signing_link_without_organization_still_accepted(self):
+        token = signing.dumps(7, salt=SIGNING_LINK_SALT)
+        self.assertEqual(contract_id_from_token(token), (7, None))
+
+
+class SendStatusTests(DocusignStandInMixin, TestCase):
+    # Maintenance commands also read every tenant database.
+    databases = {"default", *settings.TENANT_DATABASES}
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        mock.patch("contracts.views.encode_file_to_base64", return_value="cGRm").start()
+        mock.patch("contracts.views.pregenerate_recipient_view").start()
+
+    def send(self, contract):
+        return views.send_envelope(contract, "token", "acct")
+
+    def test_sent(self):
+        self.http.return_value = FakeResponse(201, {"envelopeId": "env-1"})
+        contract = make_contract(self.user)
+        self.send(contract)
+        contract.refresh_from_db()
+        self.assertEqual((contract.send_status, contract.document_id), (SendStatus.SENT, "env-1"))
+
+    def test_error_response_fails_rather_than_queues(self):
+        self.http.return_value = FakeResponse(400, {"errorCode": "INVALID_EMAIL"})
+        contract = make_contract(self.user)
+        self.send(contract)
+        contract.refresh_from_db()
+        self.assertEqual(contract.send_status, SendStatus.FAILED)
+
+    def test_unreachable_is_queued(self):
+        self.http.side_effect = requests.ConnectTimeout("connect timed out")
+        contract = make_contract(self.user)
+        with self.assertRaises(DocusignUnavailable):
+            self.send(contract)
+        contract.refresh_from_db()
+        self.assertEqual(contract.send_status, SendStatus.QUEUED)
+
+    def test_lost_response_is_unconfirmed(self):
+        self.http.side_effect = requests.ReadTimeout("read timed out")
+        contract = make_contract(self.user)
+        with self.assertRaises(DocusignResponseLost):
+            self.send(contract)
+        contract.refresh_from_db()
+        self.assertEqual(contract.send_status, SendStatus.UNCONFIRMED)
+
+    def run_queue(self):
+        with mock.patch(
+            "contracts.management.commands.send_queued_contracts.get_sender_token", return_value=("token", "acct")
+        ):
+            call_command("send_queued_contracts", stdout=StringIO(), stderr=StringIO())
+
+    def test_queue_skips_failed_sends(self):
+        make_contract(self.user, send_status=SendStatus.FAILED)
+        self.run_queue()
+        self.http.assert_not_called()
+
+    def test_queue_sends_queued(self):
+        self.http.return_value = FakeResponse(201, {"envelopeId": "env-2"})
+        contract = make_contract(self.user, send_status=SendStatus.QUEUED)
+        self.run_queue()
+        contract.refresh_from_db()
+        self.assertEqual((contract.send_status, contract.document_id), (SendStatus.SENT, "env-2"))
+
+    @skipUnless(settings.TENANT_DATABASES, "no tenant database configured")
+    def test_queue_sends_from_tenant_database(self):
+        self.http.return_value = FakeResponse(201, {"envelopeId": "env-2"})
+        org = Organization.objects.create(name="Big", slug="big", database=next(iter(settings.TENANT_DATABASES)))
+        contract = make_contract(make_user("bob", organization=org), send_status=SendStatus.QUEUED)
+        self.run_queue()
+        contract.refresh_from_db()
+        self.assertEqual((contract.send_status, contract.document_id), (SendStatus.SENT, "env-2"))
+
+    def test_queue_adopts_envelope_of_unconfirmed_send(self):
+        self.http.return_value = FakeResponse(200, {"envelopes": [{"envelopeId": "env-3"}]})
+        contract = make_contract(self.user, send_status=SendStatus.UNCONFIRMED)
+        self.run_queue()
+        contract.refresh_from_db()
+        self.assertEqual((contract.send_status, contract.document_id), (SendStatus.SENT, "env-3"))
+        # Only the lookup went out; no second envelope was created.
+        self.assertEqual([c.args[0] for c in self.http.call_args_list], ["GET"])
+        params = self.http.call_args.kwargs["params"]
+        self.assertEqual(params["custom_field"], f"contract_ref=0:{contract.id}")
+
+
+def audit_event(logged_at, action="Signed", **fields):
+    entries = [{"name": "logTime", "value": logged_at}, {"name": "Action", "value": action}]
+    entries += [{"name": name, "value": value} for name, value in fields.items()]
+    return {"eventFields": entries}
+
+
+@override_settings(AUDIT_EVENTS_PAGE_SIZE=2)
+class EnvelopeAuditTests(DocusignStandInMixin, TestCase):
+    # Maintenance commands also read every tenant database.
+    databases = {"default", *settings.TENANT_DATABASES}
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.envelope_id = uuid.uuid4()
+        make_contract(self.user, document_id=str(self.envelope_id), is_signed=True, send_status=SendStatus.SENT)
+        self.url = reverse("envelope_audit_events", args=[self.envelope_id])
+        # Action ids cached by earlier tests were rolled back with their rows.
+        audit._action_ids.clear()
+        audit._action_names.clear()
+
+    def collect(self, events):
+        self.http.return_value = FakeResponse(200, {"auditEvents": events})
+        return audit.collect_audit_events(lambda contract: ("token", "acct"), workers=1)
+
+    def test_collects_each_envelope_once(self):
+        events = [audit_event("2026-01-01T10:00:00Z", "Sent", UserName="Bob"), audit_event("2026-01-01T10:05:00Z")]
+        self.assertEqual(self.collect(events), (1, 2))
+        self.assertEqual(self.collect(events), (0, 0))
+        event = EnvelopeAuditEvent.objects.order_by("logged_at").first()
+        self.assertEqual(event.fields, {"UserName": "Bob"})
+        self.assertEqual(AuditCollection.objects.get().event_count, 2)
+
+    def test_events_are_append_only(self):
+        self.collect([audit_event("2026-01-01T10:00:00Z")])
+        event = EnvelopeAuditEvent.objects.get()
+        with self.assertRaises(TypeError):
+            event.save()
+        with self.assertRaises(TypeError):
+            EnvelopeAuditEvent.objects.all().delete()
+        with self.assertRaises(TypeError):
+            EnvelopeAuditEvent.objects.update(logged_at=datetime.now(dt_timezone.utc))
+
+    def test_pages_through_events_sharing_a_timestamp(self):
+        self.collect([audit_event("2026-01-01T10:00:00Z", Seq=str(n)) for n in range(5)])
+        self.client.force_login(self.user)
+        seen, cursor = [], None
+        while True:
+            page = self.client.get(self.url, {"after": cursor} if cursor else {}).json()
+            seen += [event["Seq"] for event in page["events"]]
+            cursor = page["next"]
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), ["0", "1", "2", "3", "4"])
+
+    @override_settings(DOCUSIGN_BURST_LIMIT=2, DOCUSIGN_BURST_WINDOW=0.2, DOCUSIGN_INTERACTIVE_RESERVE=0)
+    def test_waits_for_tokens_rather_than_dropping_fetches(self):
+        for _ in range(4):
+            make_contract(self.user, document_id=str(uuid.uuid4()), is_signed=True, send_status=SendStatus.SENT)
+        self.http.return_value = FakeResponse(200, {"auditEvents": []})
+        collected = audit.collect_audit_events(lambda contract: ("token", "acct"), workers=4, max_wait=1)
+        self.assertEqual(collected, (5, 0))
+        self.assertEqual(self.http.call_count, 5)
+
+    @override_settings(DOCUSIGN_BURST_LIMIT=2, DOCUSIGN_BURST_WINDOW=60, DOCUSIGN_INTERACTIVE_RESERVE=0)
+    def test_leaves_envelopes_over_quota_for_the_next_run(self):
+        for _ in range(4):
+            make_contract(self.user, document_id=str(uuid.uuid4()), is_signed=True, send_status=SendStatus.SENT)
+        self.http.return_value = FakeResponse(200, {"auditEvents": []})
+        collected = audit.collect_audit_events(lambda contract: ("token", "acct"), workers=4, max_wait=1)
+        self.assertEqual(collected, (2, 0))
+        self.assertEqual(AuditCollection.objects.count(), 2)
+
+    def test_only_visible_envelopes(self):
+        self.client.force_login(make_user("mallory"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.contracts = [make_contract(self.user, document_id=f"env-{n}") for n in range(5)]
+        make_contract(self.user, sender=None)
+        self.output = os.path.join(tempfile.mkdtemp(), "export")
+        self.addCleanup(lambda: os.path.exists(self.output) and os.remove(self.output))
+
+    def test_unknown_sender_matches_nothing(self):
+        self.assertFalse(filter_contracts(Contract.objects.all(), sender="typo").exists())
+        self.assertEqual(filter_contracts(Contract.objects.all(), sender="alice").count(), 5)
+
+    def test_status_filter(self):
+        self.assertEqual(list(filter_contracts(Contract.objects.all(), status="unsent")), [Contract.objects.last()])
+
+    def export(self, fmt, *args):
+        call_command("export_contracts", "--format", fmt, "--output", self.output, *args, stderr=StringIO())
+        with open(self.output, "rb") as f:
+            return f.read()
+
+    def interrupt_and_resume(self, fmt, cut):
+        full = self.export(fmt)
+        with open(self.output, "wb") as f:
+            f.write(full[:cut(full)])
+        self.assertEqual(self.export(fmt, "--resume"), full)
+        return full
+
+    def test_csv_resume_drops_partial_row(self):
+        full = self.interrupt_and_resume("csv", lambda data: data.index(b"env-2") + 3)
+        rows = list(csv.reader(full.decode().splitlines()))
+        self.assertEqual([row[0] for row in rows[1:]], [str(c.id) for c in Contract.objects.order_by("id")])
+
+    def test_jsonl_resume_drops_partial_row(self):
+        full = self.interrupt_and_resume("jsonl", lambda data: data.index(b"env-3") - 2)
+        self.assertEqual(len([json.loads(line) for line in full.splitlines()]), 6)
+
+    def test_csv_resume_within_header(self):
+        self.interrupt_and_resume("csv", lambda data: 4)
+
+
+@override_settings(DOCUSIGN_RATE_LIMIT_PER_HOUR=3600, DOCUSIGN_BURST_LIMIT=10, DOCUSIGN_INTERACTIVE_RESERVE=0.2)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.limiter = TokenBucketLimiter()
+
+    def test_bucket_empties_and_reports_wait(self):
+        for _ in range(10):
+            self.assertEqual(self.limiter.acquire("acct"), 0)
+        self.assertGreater(self.limiter.acquire("acct"), 0)
+
+    def test_bulk_leaves_interactive_reserve(self):
+        while not self.limiter.acquire("acct", priority=BULK):
+            pass
+        self.assertEqual(self.limiter.acquire("acct", priority=INTERACTIVE), 0)
+
+    def test_headers_clamp_remaining(self):
+        self.limiter.update_from_headers("acct", {"X-BurstLimit-Remaining": "0"})
+        self.assertGreater(self.limiter.acquire("acct"), 0)
+
+    def test_lock_released_only_by_its_holder(self):
+        release = self.limiter._locked("acct")
+        # A caller that gave up waiting must not free the lock it never held.
+        with mock.patch("contracts.rate_limit.time", monotonic=mock.Mock(side_effect=[0, 0, 2])):
+            self.limiter._locked("acct")()
+        self.assertIsNotNone(cache.get("docusign:ratelimit:acct:lock"))
+        release()
+        self.assertIsNone(cache.get("docusign:ratelimit:acct:lock"))
+
+    def test_scheduler_interleaves_accounts(self):
+        scheduler = FairScheduler(self.limiter)
+        for n in range(3):
+            scheduler.submit("big", lambda n=n: f"big-{n}")
+        scheduler.submit("small", lambda: "small-0")
+        scheduler.submit("urgent", lambda: "urgent-0", priority=INTERACTIVE)
+        self.assertEqual(scheduler.run(), ["urgent-0", "big-0", "small-0", "big-1", "big-2"])
+
+    def test_scheduler_leaves_jobs_when_wait_too_long(self):
+        self.limiter.update_from_headers("acct", {"X-RateLimit-Remaining": "0"})
+        scheduler = FairScheduler(self.limiter)
+        scheduler.submit("acct", lambda: "sent")
+        self.assertEqual(scheduler.run(max_wait=1), [])
+        self.assertEqual(len(scheduler), 1)
+
+
+KEK_A = "a" * 43 + "="
+KEK_B = "b" * 43 + "="
+
+
+@override_settings(DOCUSIGN_TOKEN_KEKS={"a": KEK_A, "b": KEK_B}, DOCUSIGN_TOKEN_KEK_ID="a")
+class TokenEncryptionTests(TestCase):
+    def setUp(self):
+        crypto.decrypted_cache.clear()
+
+    def test_round_trip_with_fresh_data_keys(self):
+        first, second = crypto.encrypt("secret"), crypto.encrypt("secret")
+        self.assertTrue(first.startswith("enc:v1:a:"))
+        self.assertNotEqual(first, second)
+        self.assertEqual(crypto.decrypt(first), "secret")
+
+    def test_tampering_is_detected(self):
+        value = crypto.encrypt("secret")
+        prefix, ciphertext = value.rsplit(":", 1)
+        tampered = f"{prefix}:{'A' if ciphertext[0] != 'A' else 'B'}{ciphertext[1:]}"
+        with self.assertRaises(crypto.DecryptionError):
+            crypto.decrypt(tampered)
+
+    def test_rewrap_keeps_ciphertext(self):
+        value = crypto.encrypt("secret")
+        rotated = crypto.rewrap(value, "b")
+        self.assertTrue(rotated.startswith("enc:v1:b:"))
+        self.assertEqual(rotated.rsplit(":", 1)[1], value.rsplit(":", 1)[1])
+        self.assertEqual(crypto.decrypt(rotated), "secret")
+
+    def test_rotate_command(self):
+        user = make_user()
+        DocusignProfile.objects.create(
+            user=user, access_token="access", refresh_token="refresh", token_expiry="2030-01-01T00:00:00Z",
+            account_id="acct", base_uri="https://demo.docusign.net",
+        )
+        with self.settings(DOCUSIGN_TOKEN_KEK_ID="b"):
+            call_command("rotate_token_keys", stdout=StringIO())
+        raw = DocusignProfile.objects.values_list(Cast("access_token", TextField()), flat=True).get()
+        self.assertTrue(raw.startswith("enc:v1:b:"))
+        self.assertEqual(DocusignProfile.objects.get().access_token, "access")
+
+    @override_settings(DOCUSIGN_TOKEN_KEK_ID=None, DEBUG=False)
+    def test_derived_key_refused_outside_debug(self):
+        with self.assertRaises(ImproperlyConfigured):
+            crypto.encrypt("secret")
+
+    @override_settings(DOCUSIGN_TOKEN_KEK_ID=None, DEBUG=True)
+    def test_derived_key_allowed_in_debug_and_rotated_off(self):
+        value = crypto.encrypt("secret")
+        self.assertTrue(value.startswith("enc:v1:default:"))
+        with self.settings(DEBUG=False):
+            self.assertEqual(crypto.decrypt(crypto.rewrap(value, "a")), "secret")
+
+    def test_decrypted_cache_expires(self):
+        cache_ = crypto.DecryptedCache(maxsize=2, ttl=60)
+        cache_.set("x", "1")
+        cache_.set("y", "2")
+        cache_.set("z", "3")
+        self.assertIsNone(cache_.get("x"))
+        with mock.patch("contracts.crypto.time", monotonic=lambda: time.monotonic() + 61):
+            self.assertIsNone(cache_.get("z"))
+
+
+class RetentionTests(TestCase):
+    # Maintenance commands also read every tenant database.
+    databases = {"default", *settings.TENANT_DATABASES}
+
+    def setUp(self):
+        self.user = make_user()
+        self.storage = FileSystemStorage(location=tempfile.mkdtemp())
+
+    def stored(self, name, size=100, age_days=60):
+        name = self.storage.save(f"{SHARD_ROOT}/ab/{name}", ContentFile(b"x" * size))
+        modified = time.time() - age_days * 86400
+        os.utime(self.storage.path(name), (modified, modified))
+        return name
+
+    def clean(self, dry_run):
+        return Cleaner(dry_run=dry_run, storage=self.storage).run()
+
+    def test_dry_run_reports_without_deleting(self):
+        failed = make_contract(self.user, send_status=SendStatus.FAILED, pdf_file=self.stored("failed.pdf", 300))
+        orphan = self.stored("orphan.pdf", 50)
+        report = self.clean(dry_run=True)
+        self.assertEqual((report.files, report.bytes), (2, 350))
+        self.assertEqual(report.by_kind, {"pdf_file": (1, 300), "orphan": (1, 50)})
+        self.assertTrue(self.storage.exists(failed.pdf_file.name))
+        self.assertTrue(self.storage.exists(orphan))
+
+    def test_keeps_pdf_of_queued_contracts(self):
+        queued = make_contract(self.user, send_status=SendStatus.QUEUED, pdf_file=self.stored("queued.pdf"))
+        failed = make_contract(self.user, send_status=SendStatus.FAILED, pdf_file=self.stored("failed.pdf"))
+        self.clean(dry_run=False)
+        queued.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertTrue(self.storage.exists(queued.pdf_file.name))
+        self.assertEqual(failed.pdf_file.name, "")
+
+    def test_recent_files_kept(self):
+        contract = make_contract(self.user, send_status=SendStatus.FAILED, pdf_file=self.stored("new.pdf", age_days=1))
+        self.assertEqual(self.clean(dry_run=False).files, 0)
+        self.assertTrue(self.storage.exists(contract.pdf_file.name))
+
+    @skipUnless(settings.TENANT_DATABASES, "no tenant database configured")
+    def test_files_referenced_from_tenant_database_kept(self):
+        org = Organization.objects.create(name="Big", slug="big", database=next(iter(settings.TENANT_DATABASES)))
+        contract = make_contract(make_user("bob", organization=org), document_id="env-1",
+                                 send_status=SendStatus.SENT, pdf_file=self.stored("tenant.pdf"))
+        self.assertEqual(contract._state.db, org.database)
+        self.assertEqual(self.clean(dry_run=False).files, 0)
+        self.assertTrue(self.storage.exists(contract.pdf_file.name))
+
+    def test_send_without_pdf_fails_the_contract(self):
+        contract = make_contract(self.user, send_status=SendStatus.QUEUED, pdf_file="gone.pdf")
+        with self.assertRaises(FileNotFoundError):
+            views.send_envelope(contract, "token", "acct")
+        contract.refresh_from_db()
+        self.assertEqual(contract.send_status, SendStatus.FAILED)
+
+
+class OAuthStandIn(ThreadingHTTPServer):
+    """Local stand-in for DocuSign's OAuth token and userinfo endpoints."""
+
+    def __init__(self, expires_in=3600, status=200):
+        self.expires_in = expires_in
+        self.status = status
+        self.assertions = []
+        self.userinfo_calls = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _json(self, status, data):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+                server.assertions.append(form["assertion"][0])
+                time.sleep(0.05)
+                if server.status != 200:
+                    return self._json(server.status, {"error": "consent_required"})
+                self._json(200, {"access_token": f"token-{len(server.assertions)}", "expires_in": server.expires_in})
+
+            def do_GET(self):
+                server.userinfo_calls += 1
+                self._json(200, {"accounts": [
+                    {"account_id": "other", "base_uri": "https://other"},
+                    {"account_id": "acct", "base_uri": "https://demo", "is_default": True},
+                ]})
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class JWTGrantTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        cls.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        fd, cls.key_path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(cls.key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            ))
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.key_path)
+        super().tearDownClass()
+
+    def start(self, **kwargs):
+        server = OAuthStandIn(**kwargs)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        override = self.settings(
+            DOCUSIGN_OAUTH_BASE=server.url, DOCUSIGN_PRIVATE_KEY_PATH=self.key_path, DOCUSIGN_CLIENT_ID="client",
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        jwt_auth.clear_cache()
+        jwt_auth._private_key = None
+        self.addCleanup(jwt_auth.clear_cache)
+        return server
+
+    def test_assertion_claims(self):
+        import jwt
+
+        server = self.start()
+        jwt_auth.get_jwt_token("user-1")
+        claims = jwt.decode(
+            server.assertions[0], self.key.public_key(), algorithms=["RS256"], audience=server.url.split("//")[1]
+        )
+        self.assertEqual((claims["iss"], claims["sub"]), ("client", "user-1"))
+        self.assertEqual(claims["scope"], settings.DOCUSIGN_JWT_SCOPES)
+
+    def test_token_cached_per_process(self):
+        server = self.start()
+        self.assertEqual(jwt_auth.get_jwt_token("user-1"), ("token-1", "acct"))
+        self.assertEqual(jwt_auth.get_jwt_token("user-1"), ("token-1", "acct"))
+        self.assertEqual((len(server.assertions), server.userinfo_calls), (1, 1))
+
+    def test_refreshed_inside_margin_keeping_account(self):
+        server = self.start(expires_in=jwt_auth.TOKEN_REFRESH_MARGIN - 1)
+        jwt_auth.get_jwt_token("user-1")
+        self.assertEqual(jwt_auth.get_jwt_token("user-1"), ("token-2", "acct"))
+        self.assertEqual(server.userinfo_calls, 1)
+        # The still-valid assertion is reused for the refresh.
+        self.assertEqual(server.assertions[0], server.assertions[1])
+
+    def test_concurrent_callers_share_one_grant(self):
+        server = self.start()
+        threads = [threading.Thread(target=jwt_auth.get_jwt_token, args=("user-1",)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(server.assertions), 1)
+
+    def test_rejected_grant_drops_assertion(self):
+        server = self.start(status=400)
+        with self.assertRaises(jwt_auth.JWTGrantError):
+            jwt_auth.get_jwt_token("user-1")
+        self.assertNotIn("user-1", jwt_auth._assertions)
+        self.assertEqual(server.userinfo_calls, 0)
+
+
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("contracts.circuit_breaker.time", monotonic=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("test", failure_threshold=3, slow_call_seconds=1.0, reset_timeout=30.0)
+
+    def fail(self, times=1, latency=0.1, ok=False):
+        for _ in range(times):
+            self.breaker.before_call()
+            self.breaker.record(ok, latency)
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail(2)
+        self.fail(ok=True)
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.fail()
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpen):
+            self.breaker.before_call()
+        self.assertEqual(self.breaker.snapshot()["rejected"], 1)
+
+    def test_slow_calls_count_as_failures(self):
+        self.fail(3, latency=2.0, ok=True)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.snapshot()["slow"], 3)
+
+    def test_single_probe_after_reset_timeout(self):
+        self.fail(3)
+        self.now += 30
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpen):
+            self.breaker.before_call()
+        self.breaker.record(True, 0.1)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_failed_probe_reopens(self):
+        self.fail(3)
+        self.now += 30
+        self.fail()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.now += 29
+        with self.assertRaises(CircuitOpen):
+            self.breaker.before_call()
+
+
+class DocusignRequestTests(DocusignStandInMixin, TestCase):
+    def test_open_breaker_fails_fast(self):
+        self.http.side_effect = requests.ConnectTimeout("down")
+        for _ in range(settings.DOCUSIGN_BREAKER_FAILURES):
+            with self.assertRaises(DocusignUnavailable):
+                views.docusign_request("GET", "http://docusign.test", "acct")
+        calls = self.http.call_count
+        with self.assertRaises(DocusignUnavailable):
+            views.docusign_request("GET", "http://docusign.test", "acct")
+        self.assertEqual(self.http.call_count, calls)
+
+    def test_server_errors_count_as_failures(self):
+        self.http.return_value = FakeResponse(503)
+        for _ in range(settings.DOCUSIGN_BREAKER_FAILURES):
+            views.docusign_request("GET", "http://docusign.test", "acct")
+        with self.assertRaises(DocusignUnavailable):
+            views.docusign_request("GET", "http://docusign.test", "acct")
+
+    def test_status_is_staff_only(self):
+        url = reverse("docusign_status")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(make_user())
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(make_user("admin", is_staff=True))
+        self.assertEqual(self.client.get(url).json()["circuit_breaker"]["state"], CLOSED)
+
+
+class ContractStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        override = self.settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_sharded_name(self):
+        name = sharded_name("some/dir/contract_a_b.pdf")
+        self.assertRegex(name, rf"^{SHARD_ROOT}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/contract_a_b\.pdf$")
+        self.assertEqual(name, sharded_name("contract_a_b.pdf"))
+
+    def test_base64_streams_across_chunks(self):
+        data = os.urandom(CHUNK_SIZE * 2 + 7)
+        name = default_storage.save("contracts/x/y/big.pdf", ContentFile(data))
+        self.assertEqual(encode_file_to_base64(name), base64.b64encode(data).decode())
+        self.assertIsNone(encode_file_to_base64("contracts/missing.pdf"))
+
+    def test_contract_docx_saved_sharded(self):
+        name = build_contract_docx("Alice", "Bob", "contract_Alice_Bob.docx")
+        self.assertEqual(name, sharded_name("contract_Alice_Bob.docx"))
+        self.assertTrue(default_storage.exists(name))
+
+    def test_regenerated_contract_gets_its_own_pdf(self):
+        def convert(docx_path, pdf_path):
+            with open(pdf_path, "wb") as f:
+                f.write(f"pdf {len(pdfs)}".encode())
+
+        pdfs = []
+        with mock.patch("contracts.documents.convert_to_pdf", side_effect=convert):
+            for _ in range(2):
+                docx = build_contract_docx("A", "B", "contract_A_B.docx")
+                pdfs.append(convert_stored_docx(docx))
+                # Retention removes the .docx of a sent contract.
+                default_storage.delete(docx)
+        self.assertNotEqual(pdfs[0], pdfs[1])
+        self.assertEqual(default_storage.open(pdfs[0]).read(), b"pdf 0")
+
+    def test_migrate_legacy_media(self):
+        legacy = tempfile.mkdtemp()
+        with open(os.path.join(legacy, "old.pdf"), "wb") as f:
+            f.write(b"pdf")
+        with open(os.path.join(legacy, "stray.pdf"), "wb") as f:
+            f.write(b"stray")
+        contract = make_contract(make_user(), pdf_file="old.pdf", contract_file="")
+        out = StringIO()
+        call_command("migrate_media_to_storage", "--source", legacy, "--delete", stdout=out, stderr=StringIO())
+        contract.refresh_from_db()
+        self.assertEqual(contract.pdf_file.name, sharded_name("old.pdf"))
+        self.assertEqual(default_storage.open(contract.pdf_file.name).read(), b"pdf")
+        self.assertFalse(os.path.exists(os.path.join(legacy, "old.pdf")))
+        self.assertIn("1 file(s)", out.getvalue().splitlines()[-1])
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class StatusRefreshTests(DocusignStandInMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.http.side_effect = self.envelopes
+
+    def envelopes(self, method, url, params=None, **kwargs):
+        ids = params["envelope_ids"].split(",")
+        return FakeResponse(200, {"envelopes": [
+            {"envelopeId": e, "status": "completed" if e.endswith("-done") else "sent"} for e in ids
+        ]})
+
+    def test_batched_lookups_with_one_token_per_sender(self):
+        contracts = [make_contract(self.user, document_id=f"env-{n}") for n in range(ENVELOPES_PER_REQUEST * 2 + 1)]
+        get_token = mock.Mock(return_value=("token", "acct"))
+        refresh_contracts(contracts, get_token)
+        self.assertEqual(self.http.call_count, 3)
+        get_token.assert_called_once()
+
+    def test_statuses_cached(self):
+        contracts = [make_contract(self.user, document_id="env-1")]
+        refresh_contracts(contracts, lambda c: ("token", "acct"))
+        refresh_contracts(contracts, lambda c: ("token", "acct"))
+        self.assertEqual(self.http.call_count, 1)
+
+    def test_only_completed_contracts_change(self):
+        done = make_contract(self.user, document_id="env-1-done")
+        pending = make_contract(self.user, document_id="env-2")
+        self.assertEqual(refresh_contracts([done, pending], lambda c: ("token", "acct")), [done])
+        done.refresh_from_db()
+        pending.refresh_from_db()
+        self.assertEqual((done.is_signed, pending.is_signed), (True, False))
+
+    def test_refresh_endpoint_returns_changed_rows(self):
+        done = make_contract(self.user, document_id="env-1-done")
+        pending = make_contract(self.user, document_id="env-2")
+        other = make_contract(make_user("mallory"), document_id="env-3-done")
+        self.client.force_login(self.user)
+        with mock.patch("contracts.views.get_sender_token", return_value=("token", "acct")):
+            result = self.client.post(
+                reverse("refresh_contract_status"), {"contract_ids": [done.id, pending.id, other.id]}
+            ).json()
+        self.assertEqual(result["checked"], 2)
+        self.assertEqual(list(result["changed"]), [str(done.id)])
+        self.assertIn('<td class="is-signed">True</td>', result["changed"][str(done.id)])
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ContractRowCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.contract = make_contract(self.user, recipient_name="Bob")
+        self.client.force_login(self.user)
+
+    def test_rows_cached_until_contract_saved(self):
+        self.assertContains(self.client.get(reverse("contract_list")), "Bob")
+        # A bulk update skips signals, so the cached row is served as-is.
+        Contract.objects.filter(id=self.contract.id).update(recipient_name="Carol")
+        self.assertContains(self.client.get(reverse("contract_list")), "Bob")
+        self.contract.recipient_name = "Dave"
+        self.contract.save()
+        self.assertContains(self.client.get(reverse("contract_list")), "Dave")
+
+    def test_rows_cached_per_organization(self):
+        # Tenant databases number their contracts independently.
+        acme = Organization.objects.create(name="Acme", slug="acme")
+        globex = Organization.objects.create(name="Globex", slug="globex")
+        rows = [
+            render_to_string("contracts/_contract_row.html", {
+                "contract": Contract(id=1, organization=org, recipient_name=name), "row_cache_timeout": 60,
+            })
+            for org, name in [(acme, "Bob"), (globex, "Carol")]
+        ]
+        self.assertIn("Bob", rows[0])
+        self.assertIn("Carol", rows[1])
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ContractSenderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Acme", slug="acme")
+        self.user = make_user(organization=self.org)
+        self.client.force_login(self.user)
+
+    def list_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse("contract_list")).status_code, 200)
+        return len(queries)
+
+    def test_list_queries_do_not_grow_with_senders(self):
+        for n in range(2):
+            make_contract(make_user(f"sender{n}", organization=self.org))
+        few = self.list_queries()
+        for n in range(2, 8):
+            make_contract(make_user(f"sender{n}", organization=self.org))
+        self.assertEqual(self.list_queries(), few)
+
+    def test_my_contracts_by_sender(self):
+        mine = make_contract(self.user)
+        colleague = make_contract(make_user("bob", organization=self.org))
+        response = self.client.get(reverse("my_contract_list"))
+        self.assertEqual(list(response.context["contract_list"]), [mine])
+        self.assertIn(colleague, self.client.get(reverse("contract_list")).context["contract_list"])
+
+
+class EmbeddedSigningTests(DocusignStandInMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.contract = make_contract(self.user, document_id="env-1", send_status=SendStatus.SENT)
+        self.http.return_value = FakeResponse(201, {"url": "https://demo.docusign.net/signing/1"})
+
+    def sign(self):
+        token = signing_link(self.contract).rsplit("/", 2)[-2]
+        with mock.patch("contracts.views.get_sender_token", return_value=("token", "acct")):
+            return self.client.get(reverse("sign_contract", args=[token]))
+
+    def test_redirects_to_recipient_view(self):
+        response = self.sign()
+        self.assertRedirects(response, "https://demo.docusign.net/signing/1", fetch_redirect_response=False)
+        body = self.http.call_args.kwargs["json"]
+        self.assertEqual(body["clientUserId"], str(self.contract.id))
+
+    def test_pregenerated_view_used_once(self):
+        views.pregenerate_recipient_view(self.contract, "token", "acct").result()
+        self.assertEqual(get_recipient_view_url(self.contract, "token", "acct"), "https://demo.docusign.net/signing/1")
+        get_recipient_view_url(self.contract, "token", "acct")
+        # The cached URL was handed out once; the second call made a fresh one.
+        self.assertEqual(self.http.call_count, 2)
+
+    def test_signed_contract_goes_to_success(self):
+        self.contract.is_signed = True
+        self.contract.save()
+        self.assertRedirects(self.sign(), reverse("success_page"), fetch_redirect_response=False)
+        self.http.assert_not_called()
+
+    def test_invalid_link(self):
+        self.assertEqual(self.client.get(reverse("sign_contract", args=["bogus"])).status_code, 404)
+
+
+class LazyImportTests(TestCase):
+    HEAVY = ["docx", "docx2pdf", "docusign_esign", "requests", "jwt", "pyarrow", "cryptography"]
+
+    def test_boot_path_skips_heavy_libraries(self):
+        # A fresh interpreter: this test process has long since imported them.
+        script = (
+            "import django, sys; django.setup(); import config.urls; "
+            f"print(','.join(m for m in {self.HEAVY!r} if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR, env={**os.environ, "DJANGO_SETTINGS_MODULE": "config.settings"},
+        )
+        self.assertEqual(result.stdout.strip(), "")
+
+
+class S3StandIn(ThreadingHTTPServer):
+    """Path-style S3 object API in memory, enough for django-storages."""
+
+    def __init__(self):
+        self.objects = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _key(self):
+                return self.path.split("?", 1)[0]
+
+            def _reply(self, status, body=b"", length=None):
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body) if length is None else length))
+                self.send_header("ETag", '"etag"')
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_PUT(self):
+                server.objects[self._key()] = self.rfile.read(int(self.headers["Content-Length"]))
+                self._reply(200)
+
+            def do_HEAD(self):
+                body = server.objects.get(self._key())
+                self._reply(404) if body is None else self._reply(200, length=len(body))
+
+            def do_GET(self):
+                body = server.objects.get(self._key())
+                self._reply(404) if body is None else self._reply(200, body)
+
+            def do_DELETE(self):
+                server.objects.pop(self._key(), None)
+                self._reply(204)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class S3StorageTests(TestCase):
+    def test_s3_backend_selected_and_round_trips(self):
+        server = S3StandIn()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        script = (
+            "import django; django.setup()\n"
+            "from django.core.files.base import ContentFile\n"
+            "from django.core.files.storage import default_storage, storages\n"
+            "from contracts.storage import encode_file_to_base64, sharded_name\n"
+            "print(type(storages['default']).__name__)\n"
+            "name = default_storage.save(sharded_name('c.pdf'), ContentFile(b'pdf bytes'))\n"
+            "print(name, default_storage.exists(name), encode_file_to_base64(name))\n"
+        )
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "config.settings",
+            "STORAGE_BACKEND": "s3",
+            "AWS_S3_ENDPOINT_URL": f"http://127.0.0.1:{server.server_address[1]}",
+            "AWS_S3_ADDRESSING_STYLE": "path",
+            "AWS_ACCESS_KEY_ID": "test",
+            "AWS_SECRET_ACCESS_KEY": "test",
+            # The stand-in does not decode aws-chunked upload bodies.
+            "AWS_REQUEST_CHECKSUM_CALCULATION": "when_required",
+            "AWS_RESPONSE_CHECKSUM_VALIDATION": "when_required",
+        }
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, cwd=settings.BASE_DIR, env=env,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        backend, line = result.stdout.strip().splitlines()
+        name, exists, encoded = line.split()
+        self.assertEqual(backend, "S3Storage")
+        self.assertEqual((exists, encoded), ("True", base64.b64encode(b"pdf bytes").decode()))
+        self.assertEqual(server.objects[f"/contracts/{name}"], b"pdf bytes")
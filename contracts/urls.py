@@ -3,9 +3,16 @@ from . import views
 
 urlpatterns = [
     path("", views.ContractListView.as_view(), name="contract_list"),
+    path("mine/", views.MyContractListView.as_view(), name="my_contract_list"),
+    path("export/", views.export_contracts, name="export_contracts"),
+    path("audit/<uuid:envelope_id>/", views.envelope_audit_events, name="envelope_audit_events"),
+    path("status/refresh/", views.refresh_contract_status, name="refresh_contract_status"),
+    path("status/stream/", views.contract_status_stream, name="contract_status_stream"),
     path("create/", views.create_contract, name="contract_instantiation"),
     path("send/", views.submit_contract_to_docusign, name="send_to_docusign"),
     path("success/", views.success_page, name="success_page"),
+    path("sign/<str:token>/", views.sign_contract, name="sign_contract"),
     path("docusign/login/", views.docusign_login, name="docusign_login"),
     path("docusign/callback/", views.docusign_callback, name="docusign_callback"),
+    path("docusign/status/", views.docusign_status, name="docusign_status"),
 ]
\ No newline at end of file
@@ -1,32 +1,40 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.core.mail import send_mail
 from django.urls import reverse
-from docx import Document
 from django.conf import settings
-from django.http import HttpResponse
+from django.db.models import Q
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.generic import ListView
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.utils import timezone
+from django.core.signing import BadSignature
+from django.utils.dateparse import parse_date, parse_datetime
 from datetime import timedelta
 from urllib.parse import urlencode
 
-import os
-import base64
-import requests
-from docx2pdf import convert
-import ctypes
 import logging
 
-from .models import Contract, DocusignProfile
+from accounts.models import Organization
+from .models import Contract, DocusignProfile, EnvelopeAuditEvent, SendStatus
+from .documents import build_contract_docx, convert_stored_docx
+from .storage import encode_file_to_base64
+from .jwt_auth import get_jwt_token, JWTGrantError
+from .docusign_client import breaker, docusign_request, DocusignResponseLost, DocusignUnavailable
+from .rate_limit import INTERACTIVE, RateLimited
+from .status import refresh_contracts
+from .live import events_visible_to, stream
+from .audit import action_name
+from .export import ExportError, FORMATS, filter_contracts, stream_export
+from .signing import client_user_id, contract_id_from_token, get_recipient_view_url, pregenerate_recipient_view, signing_link
 
 logger = logging.getLogger(__name__)
 
-if os.name == "nt":
-    ole32 = ctypes.windll.ole32
-    result = ole32.CoInitialize(None)
-else:
-    ole32 = None
-    result = None
+# Envelope custom field holding envelope_ref(contract)
+ENVELOPE_REF_FIELD = "contract_ref"
 
 def docusign_login(request):
     redirect_uri = request.build_absolute_uri(reverse('docusign_callback'))
@@ -37,10 +45,12 @@ def docusign_login(request):
         "client_id": settings.DOCUSIGN_CLIENT_ID,
         "redirect_uri": redirect_uri
     }
-    url = f"https://account-d.docusign.com/oauth/auth?{urlencode(params)}"
+    url = f"{settings.DOCUSIGN_OAUTH_BASE}/oauth/auth?{urlencode(params)}"
     return redirect(url)
 
 def docusign_callback(request):
+    import requests
+
     code = request.GET.get("code")
     if not code:
         return HttpResponse("No code provided")
@@ -54,7 +64,7 @@ def docusign_callback(request):
         "redirect_uri": redirect_uri
     }
 
-    response = requests.post("https://account-d.docusign.com/oauth/token", data=data)
+    response = requests.post(f"{settings.DOCUSIGN_OAUTH_BASE}/oauth/token", data=data, timeout=settings.DOCUSIGN_HTTP_TIMEOUT)
 
     if response.status_code == 200:
         token_data = response.json()
@@ -64,8 +74,9 @@ def docusign_callback(request):
 
         # Fetch account info from /userinfo endpoint
         userinfo_response = requests.get(
-            "https://account-d.docusign.com/oauth/userinfo",
-            headers={"Authorization": f"Bearer {access_token}"}
+            f"{settings.DOCUSIGN_OAUTH_BASE}/oauth/userinfo",
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=settings.DOCUSIGN_HTTP_TIMEOUT,
         )
 
         if userinfo_response.status_code != 200:
@@ -84,7 +95,8 @@ def docusign_callback(request):
                 "refresh_token": refresh_token,
                 "token_expiry": timezone.now() + timedelta(seconds=int(expires_in)),
                 "account_id": account_id,
-                "base_uri": base_uri
+                "base_uri": base_uri,
+                "docusign_user_id": userinfo.get("sub"),
             }
         )
 
@@ -92,8 +104,20 @@ def docusign_callback(request):
 
     return HttpResponse("Failed to authenticate with DocuSign")
 
+def get_profile(user):
+    # Goes through the reverse one-to-one accessor so a profile loaded with
+    # Contract.objects.with_senders() costs no extra query.
+    if user is None or not user.is_authenticated:
+        return None
+    try:
+        return user.docusignprofile
+    except DocusignProfile.DoesNotExist:
+        return None
+
 def get_user_token(user):
-    profile = DocusignProfile.objects.filter(user=user).first()
+    import requests
+
+    profile = get_profile(user)
     if not profile:
         return None
 
@@ -104,7 +128,11 @@ def get_user_token(user):
             "client_id": settings.DOCUSIGN_CLIENT_ID,
             "client_secret": settings.DOCUSIGN_CLIENT_SECRET
         }
-        response = requests.post("https://account-d.docusign.com/oauth/token", data=data)
+        try:
+            response = requests.post(f"{settings.DOCUSIGN_OAUTH_BASE}/oauth/token", data=data, timeout=settings.DOCUSIGN_HTTP_TIMEOUT)
+        except requests.RequestException as e:
+            logger.error(f"Token refresh failed for {user}: {e}")
+            return None
         if response.status_code == 200:
             token_data = response.json()
             profile.access_token = token_data["access_token"]
@@ -115,31 +143,37 @@ def get_user_token(user):
             return None
     return profile.access_token, profile.account_id
 
+def get_service_token(user):
+    """Token for background work on behalf of ``user``, via JWT Grant.
+
+    Falls back to the stored authorization-code token when JWT Grant is not
+    configured or fails, e.g. the user has not consented to impersonation.
+    """
+    profile = get_profile(user)
+    if profile and profile.docusign_user_id and settings.DOCUSIGN_CLIENT_ID:
+        try:
+            return get_jwt_token(profile.docusign_user_id)
+        except (JWTGrantError, OSError) as e:
+            logger.warning(f"JWT grant unavailable for {user}: {e}")
+    return get_user_token(user)
+
 def create_contract(request):
     if request.method == "POST":
         user_name = request.POST["user_name"]
         recipient_name = request.POST["recipient_name"]
         recipient_email = request.POST["recipient_email"]
 
-        doc = Document()
-        doc.add_heading("Contract Agreement", level=1)
-        doc.add_paragraph(f"Party 1: {user_name}")
-        doc.add_paragraph(f"Party 2: {recipient_name}")
-        doc.add_paragraph("\nThis agreement is binding and requires signatures.")
-
-        contract_filename = f"contract_{user_name}_{recipient_name}.docx"
-        contract_path = os.path.join(settings.MEDIA_ROOT, contract_filename)
-        doc.save(contract_path)
-        return redirect(reverse("send_to_docusign") + f"?contract_path={contract_filename}&recipient_email={recipient_email}&user_name={user_name}&recipient_name={recipient_name}")
+        contract_filename = build_contract_docx(user_name, recipient_name, f"contract_{user_name}_{recipient_name}.docx")
+        query = urlencode({
+            "contract_path": contract_filename,
+            "recipient_email": recipient_email,
+            "user_name": user_name,
+            "recipient_name": recipient_name,
+        })
+        return redirect(reverse("send_to_docusign") + f"?{query}")
 
     return render(request, "contracts/contract_form.html")
 
-def encode_file_to_base64(file_path):
-    if not os.path.exists(file_path):
-        return None
-    with open(file_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
-
 def submit_contract_to_docusign(request):
     user = request.user
     token_account = get_user_token(user)
@@ -147,6 +181,7 @@ def submit_contract_to_docusign(request):
         return redirect("docusign_login")
 
     access_token, account_id = token_account
+    account_id = organization_account_id(user.organization, account_id)
 
     user_name = request.GET.get("user_name")
     recipient_name = request.GET.get("recipient_name")
@@ -157,27 +192,47 @@ def submit_contract_to_docusign(request):
         messages.error(request, "Missing required information.")
         return redirect("contract_instantiation")
 
-    contract_path = os.path.join(settings.MEDIA_ROOT, contract_filename)
-    pdf_path = contract_path.replace(".docx", ".pdf")
-
     try:
-        convert(contract_path, pdf_path)
+        pdf_filename = convert_stored_docx(contract_filename)
     except Exception as e:
         return HttpResponse(f"Conversion error: {str(e)}")
 
-    encoded_pdf = encode_file_to_base64(pdf_path)
-    if not encoded_pdf:
-        return HttpResponse("Error reading PDF.")
-
     contract = Contract.objects.create(
+        organization=user.organization,
+        sender=user,
         user_name=user_name,
         recipient_email=recipient_email,
         recipient_name=recipient_name,
-        contract_file=contract_filename
+        contract_file=contract_filename,
+        pdf_file=pdf_filename
     )
 
+    try:
+        response = send_envelope(contract, access_token, account_id)
+    except RateLimited as e:
+        # The sender is told it failed and will resubmit, so it is not queued.
+        set_send_status(contract, SendStatus.FAILED)
+        return HttpResponse(str(e), status=429)
+    except DocusignUnavailable as e:
+        logger.warning(f"Queued contract {contract.id}: {e}")
+        messages.warning(request, "DocuSign is currently unavailable. Your contract has been queued and will be sent automatically.")
+        return redirect("contract_list")
+    if response.status_code == 201:
+        return redirect("success_page")
+    return HttpResponse("Error sending contract: " + response.text)
+
+def send_envelope(contract, access_token, account_id, priority=INTERACTIVE):
+    encoded_pdf = encode_file_to_base64(contract.pdf_file.name)
+    if not encoded_pdf:
+        # Nothing left to send; keep send_queued_contracts from retrying it.
+        set_send_status(contract, SendStatus.FAILED)
+        raise FileNotFoundError(contract.pdf_file.name)
+
     envelope_data = {
         "emailSubject": "Contract Agreement - Please Sign",
+        "customFields": {
+            "textCustomFields": [{"name": ENVELOPE_REF_FIELD, "value": envelope_ref(contract), "show": "false"}]
+        },
         "documents": [{
             "documentBase64": encoded_pdf,
             "name": "Contract Agreement",
@@ -186,9 +241,10 @@ def submit_contract_to_docusign(request):
         }],
         "recipients": {
             "signers": [{
-                "email": recipient_email,
-                "name": "Recipient",
+                "email": contract.recipient_email,
+                "name": contract.recipient_name,
                 "recipientId": "1",
+                "clientUserId": client_user_id(contract),
                 "tabs": {
                     "signHereTabs": [{"xPosition": "200", "yPosition": "500", "documentId": "1", "pageNumber": "1"}]
                 }
@@ -197,20 +253,60 @@ def submit_contract_to_docusign(request):
         "status": "sent"
     }
 
-    url = f"https://demo.docusign.net/restapi/v2.1/accounts/{account_id}/envelopes"
+    url = f"{settings.DOCUSIGN_API_BASE}/v2.1/accounts/{account_id}/envelopes"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json"
     }
 
-    response = requests.post(url, headers=headers, json=envelope_data)
+    try:
+        response = docusign_request("POST", url, account_id, priority=priority, headers=headers, json=envelope_data)
+    except DocusignResponseLost:
+        # DocuSign may have created the envelope; it is looked up before any retry.
+        set_send_status(contract, SendStatus.UNCONFIRMED)
+        raise
+    except DocusignUnavailable:
+        set_send_status(contract, SendStatus.QUEUED)
+        raise
     if response.status_code == 201:
-        envelope_id = response.json().get("envelopeId")
-        contract.document_id = envelope_id
-        contract.save()
-        notify_recipient(recipient_email, envelope_id)
-        return redirect("success_page")
-    return HttpResponse("Error sending contract: " + response.text)
+        envelope_sent(contract, response.json().get("envelopeId"), access_token, account_id)
+    else:
+        set_send_status(contract, SendStatus.FAILED)
+    return response
+
+def envelope_ref(contract):
+    # Identifies the contract across tenant databases, whose ids overlap.
+    return f"{contract.organization_id or 0}:{contract.pk}"
+
+def set_send_status(contract, status):
+    contract.send_status = status
+    contract.save(update_fields=["send_status"])
+
+def envelope_sent(contract, envelope_id, access_token, account_id):
+    contract.document_id = envelope_id
+    contract.send_status = SendStatus.SENT
+    contract.save()
+    notify_recipient(contract.recipient_email, signing_link(contract))
+    # The recipient usually opens the email within minutes.
+    pregenerate_recipient_view(contract, access_token, account_id)
+
+def find_sent_envelope(contract, access_token, account_id, priority=INTERACTIVE):
+    """Envelope id DocuSign already created for an unconfirmed send, if any.
+
+    DocuSign has no idempotency keys, so a send whose response was lost is
+    matched by the reference stored in the envelope's custom fields.
+    """
+    url = f"{settings.DOCUSIGN_API_BASE}/v2.1/accounts/{account_id}/envelopes"
+    headers = {"Authorization": f"Bearer {access_token}"}
+    params = {
+        "from_date": (contract.created_at - timedelta(days=1)).isoformat(),
+        "custom_field": f"{ENVELOPE_REF_FIELD}={envelope_ref(contract)}",
+    }
+    response = docusign_request("GET", url, account_id, priority=priority, headers=headers, params=params)
+    if response.status_code != 200:
+        raise DocusignUnavailable(f"Envelope lookup failed: {response.status_code} {response.text}")
+    envelopes = response.json().get("envelopes") or []
+    return envelopes[0]["envelopeId"] if envelopes else None
 
 def notify_recipient(email, contract_url):
     subject = "Contract Agreement - Please Sign"
@@ -223,34 +319,194 @@ def notify_recipient(email, contract_url):
 def success_page(request):
     return render(request, "contracts/success.html")
 
+@staff_member_required
+def docusign_status(request):
+    return JsonResponse({"circuit_breaker": breaker.snapshot()})
+
+def organization_account_id(organization, account_id):
+    # An organization may send everything from one shared DocuSign account.
+    if organization is not None and organization.docusign_account_id:
+        return organization.docusign_account_id
+    return account_id
+
+def get_sender_token(contract):
+    token_account = get_service_token(contract.sender)
+    if not token_account:
+        return None
+    access_token, account_id = token_account
+    return access_token, organization_account_id(contract.organization, account_id)
+
+def sign_contract(request, token):
+    try:
+        contract_id, organization_id = contract_id_from_token(token)
+    except BadSignature:
+        return HttpResponse("This signing link is invalid or has expired.", status=404)
+    # The recipient is anonymous, so no current organization routes the read.
+    contracts = Contract.objects.with_senders()
+    if organization_id is not None:
+        organization = get_object_or_404(Organization, id=organization_id)
+        contracts = contracts.for_organization(organization)
+    contract = get_object_or_404(contracts, id=contract_id, document_id__isnull=False)
+    if contract.is_signed:
+        return redirect("success_page")
+
+    token_account = get_sender_token(contract)
+    if not token_account:
+        return HttpResponse("The sender's DocuSign account is not connected.", status=503)
+    access_token, account_id = token_account
+    try:
+        url = get_recipient_view_url(contract, access_token, account_id)
+    except (RateLimited, DocusignUnavailable) as e:
+        logger.warning(str(e))
+        url = None
+    if not url:
+        return HttpResponse("Signing is temporarily unavailable, please try again shortly.", status=503)
+    return redirect(url)
+
 def is_contract_signed(contract):
-    profile = DocusignProfile.objects.filter(user__username=contract.user_name).first()
-    if not profile:
-        return False
-    token, account_id = get_user_token(profile.user)
-    url = f"https://demo.docusign.net/restapi/v2.1/accounts/{account_id}/envelopes/{contract.document_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
+    if not contract.is_signed:
+        refresh_contracts([contract], get_sender_token)
+    return contract.is_signed
+
+async def contract_status_stream(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse("Login required", status=403)
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the endless stream would be buffered and hold a worker
+        # forever; 204 tells EventSource not to reconnect.
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(stream(events_visible_to(user)), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+def export_contracts(request):
+    if not request.user.is_authenticated:
+        return redirect("login")
+    params = request.GET
+    fmt = params.get("format", "csv")
+    try:
+        after_id = int(params.get("after_id") or 0)
+        queryset = filter_contracts(
+            Contract.objects.visible_to(request.user),
+            created_from=parse_date_param(params.get("from")),
+            created_to=parse_date_param(params.get("to")),
+            status=params.get("status"),
+            sender=params.get("sender"),
+            after_id=after_id,
+        )
+        chunks = stream_export(queryset, fmt, header=not after_id)
+    except (ExportError, ValueError) as e:
+        return HttpResponse(str(e), status=400)
+    content_type, extension = FORMATS[fmt]
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="contracts.{extension}"'
+    return response
+
+def parse_date_param(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value) or parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date {value!r}")
+    return parsed
+
+def refresh_contract_status(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Login required"}, status=403)
+    ids = request.POST.getlist("contract_ids")[:settings.STATUS_REFRESH_MAX_IDS]
+    contracts = list(Contract.objects.visible_to(request.user).with_senders().filter(id__in=ids))
+    changed = refresh_contracts(contracts, get_sender_token)
+    rows = {
+        contract.id: render_to_string(
+            "contracts/_contract_row.html",
+            {"contract": contract, "row_cache_timeout": settings.CONTRACT_ROW_CACHE_TIMEOUT},
+            request=request,
+        )
+        for contract in changed
     }
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        if response.json().get("status") == "completed":
-            contract.is_signed = True
-            contract.save()
-            return True
-    return False
-
-class ContractListView(ListView):
+    return JsonResponse({
+        "checked": len(contracts),
+        "changed": {str(contract_id): html for contract_id, html in rows.items()},
+    })
+
+def envelope_audit_events(request, envelope_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Login required"}, status=403)
+    # DocuSign envelope ids are lowercase GUIDs, as the uuid converter renders them.
+    get_object_or_404(Contract.objects.visible_to(request.user), document_id=str(envelope_id))
+    events = EnvelopeAuditEvent.objects.filter(envelope_id=envelope_id).order_by("logged_at", "id")
+    try:
+        after, after_id = parse_audit_cursor(request.GET.get("after"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    if after:
+        # Keyset on (logged_at, id): events sharing a timestamp can straddle pages.
+        keyset = Q(logged_at__gt=after)
+        if after_id is not None:
+            keyset |= Q(logged_at=after, id__gt=after_id)
+        events = events.filter(keyset)
+    page = list(events[:settings.AUDIT_EVENTS_PAGE_SIZE])
+    last = page[-1] if len(page) == settings.AUDIT_EVENTS_PAGE_SIZE else None
+    return JsonResponse({
+        "envelope_id": str(envelope_id),
+        "events": [
+            {"logged_at": event.logged_at.isoformat(), "action": action_name(event.action_id), **event.fields}
+            for event in page
+        ],
+        # UTC with "Z", so the cursor survives being pasted into a query string.
+        "next": f"{last.logged_at.isoformat().replace('+00:00', 'Z')},{last.id}" if last else None,
+    })
+
+def parse_audit_cursor(value):
+    """Split an audit page cursor into ``(logged_at, id)``.
+
+    A bare date or datetime is accepted too and starts after that moment.
+    """
+    if not value:
+        return None, 0
+    moment, _, event_id = value.partition(",")
+    after = parse_date_param(moment)
+    if not event_id:
+        return after, None
+    if not event_id.isdigit():
+        raise ValueError(f"Invalid cursor {value!r}")
+    return after, int(event_id)
+
+class ContractListView(LoginRequiredMixin, ListView):
     model = Contract
     template_name = "contracts/contract_list.html"
+    ordering = "-id"
+
+    def get_queryset(self):
+        return super().get_queryset().visible_to(self.request.user).with_senders()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["row_cache_timeout"] = settings.CONTRACT_ROW_CACHE_TIMEOUT
+        # The live stream is only offered when served through config.asgi.
+        context["live_status"] = isinstance(self.request, ASGIRequest)
+        return context
 
     def post(self, request, *args, **kwargs):
         contract_id = request.POST.get("contract_id")
         if contract_id:
-            contract = get_object_or_404(Contract, id=contract_id)
+            contract = get_object_or_404(self.get_queryset(), id=contract_id)
             if is_contract_signed(contract):
                 messages.success(request, f"Contract '{contract.id}' is signed.")
             else:
                 messages.warning(request, f"Contract '{contract.id}' is not signed.")
-        return self.get(request, *args, **kwargs)
\ No newline at end of file
+        ids = request.POST.getlist("contract_ids")[:settings.STATUS_REFRESH_MAX_IDS]
+        if ids:
+            contracts = self.get_queryset().filter(id__in=ids)
+            changed = refresh_contracts(list(contracts), get_sender_token)
+            messages.info(request, f"Checked {len(ids)} contract(s), {len(changed)} newly signed.")
+        return self.get(request, *args, **kwargs)
+
+class MyContractListView(ContractListView):
+    # Served by contract_org_sender_idx / contract_sender_recent_idx.
+    def get_queryset(self):
+        return super().get_queryset().filter(sender=self.request.user)
@@ -0,0 +1,27 @@
+import os
+
+# Served over ASGI: the contract list's status stream stays open for as long
+# as the page does, which under sync workers would pin a worker per browser
+# until the timeout killed it.
+wsgi_app = "config.asgi:application"
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "3"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+
+# With preloading the app is imported once in the master and shared with the
+# workers through fork; without it every worker boots lazily on its own.
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+
+
+def when_ready(server):
+    if preload_app:
+        from contracts.startup import warm_up
+
+        warm_up()
+
+
+def post_fork(server, worker):
+    from django.db import connections
+
+    connections.close_all()